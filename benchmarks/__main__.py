@@ -0,0 +1,77 @@
+"""
+Benchmark suite for utils/helpers.py and end-to-end chat latency.
+
+Usage:
+    python -m benchmarks run [--suite micro|macro|all] [--filter NAME] [--replay ARCHIVE]
+    python -m benchmarks compare [--base REF] [--head REF]
+
+Results are stored per commit in benchmarks/results/<sha>.json. compare exits
+with status 1 when a benchmark regresses past its budget in benchmarks/budgets.json.
+"""
+import argparse
+import sys
+
+from benchmarks import core, micro  # noqa: F401  (registers microbenchmarks)
+
+
+def _cmd_run(args) -> int:
+    suites = ["micro", "macro"] if args.suite == "all" else [args.suite]
+    if "macro" in suites:
+        from benchmarks import macro  # noqa: F401  (needs selenium; imported on demand)
+    results, failed = core.run_suites(suites, args, args.filter)
+    if not args.no_save and results:
+        commit = core.resolve_commit(args.commit) if args.commit else core.current_commit()
+        print(f"[Benchmark] Saved {len(results)} results to {core.save_results(results, commit)}")
+    if failed:
+        print(f"[Benchmark] {len(failed)} benchmark(s) failed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+def _cmd_compare(args) -> int:
+    head_commit, base_commit = core.resolve_commit(args.head), core.resolve_commit(args.base)
+    head = core.load_results(head_commit)
+    if head is None:
+        print(f"[Benchmark] No results for head {head_commit}; run 'python -m benchmarks run' first")
+        return 2
+    base = core.load_results(base_commit)
+    if base is None:
+        print(f"[Benchmark] No results for base {base_commit}; only absolute budgets are checked")
+
+    failures = core.compare(base, head, core.load_budgets())
+    if failures:
+        print("\n[Benchmark] Budget exceeded:\n  " + "\n  ".join(failures))
+        return 1
+    print("\n[Benchmark] All benchmarks within budget")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks and store results for a commit")
+    run.add_argument("--suite", choices=["micro", "macro", "all"], default="micro")
+    run.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this")
+    run.add_argument("--commit", default=None, help="Store results under this ref (default=HEAD)")
+    run.add_argument("--no-save", action="store_true", help="Print results without storing them")
+    run.add_argument("--corpus-mb", type=float, default=5.0, help="Arabic corpus size for *_corpus benchmarks (default=5)")
+    run.add_argument("--base-url", default="https://govgpt.sandbox.dge.gov.ae/", help="Origin the archive was recorded from")
+    run.add_argument("--replay", default=None, help="Recorded archive for macrobenchmarks (see pytest --record)")
+    run.add_argument("--replay-latency", type=float, default=0.0, help="Latency in ms per replayed response")
+    run.add_argument("--replay-jitter", type=float, default=0.0, help="Random +/- jitter in ms")
+    run.add_argument("--browser-profile", default="full", help="Chrome profile for macrobenchmarks")
+    run.set_defaults(handler=_cmd_run)
+
+    cmp = commands.add_parser("compare", help="Fail if head regressed past budgets relative to base")
+    cmp.add_argument("--base", default="HEAD~1", help="Baseline ref (default=HEAD~1)")
+    cmp.add_argument("--head", default="HEAD", help="Ref to check (default=HEAD)")
+    cmp.set_defaults(handler=_cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Minimal benchmark registry, runner, result storage and budget comparison.
+
+A benchmark is a generator function registered with @benchmark. It receives
+the CLI options, does its setup, yields the zero-argument callable to time,
+and cleans up after the yield (like a pytest yield fixture). It may instead
+yield a (prepare, target) pair; prepare then runs untimed before every call
+of target, e.g. to log out or open a fresh page.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Callable
+from datetime import datetime
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), "budgets.json")
+
+
+@dataclass
+class Benchmark:
+    suite: str
+    name: str
+    func: Callable
+    number: int
+    repeat: int
+
+
+REGISTRY: dict[str, Benchmark] = {}
+
+
+def benchmark(suite: str, name: str, number: int = 1, repeat: int = 5):
+    """Register a benchmark; number = calls per timed repeat, repeat = timed repeats."""
+    def decorator(func):
+        REGISTRY[name] = Benchmark(suite, name, func, number, repeat)
+        return func
+    return decorator
+
+
+class SkipBenchmark(Exception):
+    """Raised from setup when a benchmark cannot run in this environment."""
+
+
+# -------------------------
+# Running
+# -------------------------
+
+def run_benchmark(bench: Benchmark, options) -> dict:
+    """Time one benchmark; returns per-call seconds statistics."""
+    setup = bench.func(options)
+    try:
+        target = next(setup)
+        prepare, target = target if isinstance(target, tuple) else (None, target)
+        if prepare:
+            prepare()
+        target()  # warm-up, not timed
+        samples = []
+        for _ in range(bench.repeat):
+            if prepare is None:
+                start = time.perf_counter()
+                for _ in range(bench.number):
+                    target()
+                samples.append((time.perf_counter() - start) / bench.number)
+                continue
+            elapsed = 0.0
+            for _ in range(bench.number):
+                prepare()
+                start = time.perf_counter()
+                target()
+                elapsed += time.perf_counter() - start
+            samples.append(elapsed / bench.number)
+    finally:
+        setup.close()
+    return {
+        "suite": bench.suite,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+        "number": bench.number,
+        "repeat": bench.repeat,
+    }
+
+
+def run_suites(suites: list[str], options, pattern: str | None = None) -> tuple[dict, list[str]]:
+    """Run the selected benchmarks; returns (results, names of benchmarks that failed)."""
+    results, failed = {}, []
+    for bench in REGISTRY.values():
+        if bench.suite not in suites or (pattern and pattern not in bench.name):
+            continue
+        try:
+            results[bench.name] = run_benchmark(bench, options)
+        except SkipBenchmark as e:
+            print(f"[Benchmark] SKIP {bench.name}: {e}")
+            continue
+        except Exception as e:
+            # One broken benchmark (e.g. a macro timeout) must not lose the others' results
+            print(f"[Benchmark] FAIL {bench.name}: {type(e).__name__}: {e}")
+            failed.append(bench.name)
+            continue
+        print(f"[Benchmark] {bench.name:<40} median {format_seconds(results[bench.name]['median'])}")
+    return results, failed
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f}ms"
+    return f"{seconds * 1e6:.1f}us"
+
+
+# -------------------------
+# Storage
+# -------------------------
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def resolve_commit(ref: str) -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", ref], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ref
+
+
+def results_path(commit: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{commit}.json")
+
+
+def save_results(results: dict, commit: str | None = None) -> str:
+    """Merge results into the file for commit (suites can be run separately)."""
+    commit = commit or current_commit()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = results_path(commit)
+    stored = load_results(commit) or {"commit": commit, "benchmarks": {}}
+    stored["benchmarks"].update(results)
+    stored["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    stored["machine"] = {"python": platform.python_version(), "platform": platform.platform()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(commit: str) -> dict | None:
+    path = results_path(commit)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# -------------------------
+# Comparison
+# -------------------------
+
+def load_budgets() -> dict:
+    with open(BUDGETS_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(base: dict, head: dict, budgets: dict) -> list[str]:
+    """
+    Compare timings and return regression messages.
+    Microbenchmarks compare the fastest repeat (least scheduler noise),
+    macrobenchmarks the median. A benchmark regresses when head is slower
+    than base by more than its relative budget, or slower than its absolute
+    max_seconds budget.
+    """
+    failures = []
+    default_ratio = budgets.get("default_max_regression", 0.25)
+    per_benchmark = budgets.get("benchmarks", {})
+
+    for name, head_stats in sorted(head["benchmarks"].items()):
+        budget = per_benchmark.get(name, {})
+        max_ratio = budget.get("max_regression", default_ratio)
+        stat = "min" if head_stats["suite"] == "micro" else "median"
+        head_value = head_stats[stat]
+        line = f"{name:<40} head {format_seconds(head_value):>10}"
+
+        base_stats = base["benchmarks"].get(name) if base else None
+        if base_stats:
+            change = head_value / base_stats[stat] - 1 if base_stats[stat] else 0.0
+            line += f"  base {format_seconds(base_stats[stat]):>10}  {change:+7.1%} (budget {max_ratio:+.0%})"
+            if change > max_ratio:
+                failures.append(f"{name}: {change:+.1%} slower than base, budget {max_ratio:+.0%}")
+                line += "  REGRESSION"
+        if "max_seconds" in budget and head_value > budget["max_seconds"]:
+            failures.append(f"{name}: {format_seconds(head_value)} exceeds {format_seconds(budget['max_seconds'])}")
+            line += "  OVER BUDGET"
+        print(line)
+    return failures
@@ -0,0 +1,105 @@
+"""
+Macrobenchmarks against the local stand-in server (utils/replay.py).
+
+These need Chrome and a recorded archive (--replay); they are skipped otherwise.
+Page loads happen in the untimed prepare step, so the timings cover the UI
+interaction only, not navigation.
+"""
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.helpers import create_driver, launch_driver, load_locators, load_test_data, login_to_dashboard, setup_chat
+from utils.replay import HermeticSession
+from benchmarks.core import SkipBenchmark, benchmark
+
+
+def _replay_session(options) -> HermeticSession:
+    if not options.replay:
+        raise SkipBenchmark("no --replay archive given")
+    return HermeticSession(
+        base_url=options.base_url,
+        replay_path=options.replay,
+        latency_ms=options.replay_latency,
+        jitter_ms=options.replay_jitter,
+    ).start()
+
+
+def _send_and_wait(driver, locators, message, locator):
+    setup_chat(driver, locators).send_keys(message + Keys.ENTER)
+    WebDriverWait(driver, 60).until(EC.presence_of_element_located(locator))
+
+
+def _log_out(driver):
+    """Drop the session; the app keeps its token in localStorage, not only in cookies."""
+    driver.delete_all_cookies()
+    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+
+
+def _new_chat(driver, hermetic, locators):
+    """Prepare step: open a fresh chat page and wait for the input."""
+    def new_chat():
+        driver.get(hermetic.base_url)
+        setup_chat(driver, locators)
+    return new_chat
+
+
+@benchmark("macro", "login", repeat=3)
+def bench_login(options):
+    """Credentials form to dashboard greeting; logout and login page load are untimed."""
+    hermetic = _replay_session(options)
+    locators, credentials = load_locators(), load_test_data()["credentials"]
+    driver = create_driver(hermetic, headless=True, profile=options.browser_profile)
+    driver.get(hermetic.base_url)  # storage can only be cleared on the app's origin
+
+    def open_login_page():
+        _log_out(driver)
+        driver.get(hermetic.base_url)
+
+    def login():
+        login_to_dashboard(driver, locators, credentials)
+
+    try:
+        yield open_login_page, login
+    finally:
+        driver.quit()
+        hermetic.stop()
+
+
+@benchmark("macro", "first_message", repeat=3)
+def bench_first_message(options):
+    """Send to first assistant message in the DOM (time to first token as seen by the UI; page load untimed)."""
+    hermetic = _replay_session(options)
+    locators, data = load_locators(), load_test_data()
+    driver = launch_driver(hermetic, locators, data["credentials"], profile=options.browser_profile)
+    message = data["ui_tests"]["test_messages"]["input_field_test"]["message"]
+    ai_locator = (By.XPATH, locators["chat_widget"]["ai_message"])
+
+    def first_message():
+        _send_and_wait(driver, locators, message, ai_locator)
+
+    try:
+        yield _new_chat(driver, hermetic, locators), first_message
+    finally:
+        driver.quit()
+        hermetic.stop()
+
+
+@benchmark("macro", "full_query", repeat=3)
+def bench_full_query(options):
+    """Send to response-complete indicator for the first common query (page load untimed)."""
+    hermetic = _replay_session(options)
+    locators, data = load_locators(), load_test_data()
+    driver = launch_driver(hermetic, locators, data["credentials"], profile=options.browser_profile)
+    message = data["response_validation"]["common_queries"][0]["en"]
+    done_locator = (By.CSS_SELECTOR, locators["chat_widget"]["response_complete_indicator"])
+
+    def full_query():
+        _send_and_wait(driver, locators, message, done_locator)
+
+    try:
+        yield _new_chat(driver, hermetic, locators), full_query
+    finally:
+        driver.quit()
+        hermetic.stop()
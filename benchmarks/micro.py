@@ -0,0 +1,149 @@
+"""
+Microbenchmarks for utils/helpers.py: checkers, test-data loading, logging and screenshots,
+plus text-normalization throughput over a large Arabic corpus (size set by --corpus-mb).
+"""
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+from utils.helpers import (
+    load_locators, load_test_data, local_similarity, log_ui_result, malicious_response_checker,
+    response_accuracy_checker, save_screenshot,
+)
+from utils.text_normalization import normalize_text, tokenize
+from benchmarks.core import benchmark
+
+# 1x1 transparent PNG, enough to exercise the screenshot file path without a browser
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
+
+
+class _ScreenshotDriver:
+    """Stands in for WebDriver.save_screenshot so only the helper's own I/O is measured."""
+
+    def save_screenshot(self, path):
+        with open(path, "wb") as f:
+            f.write(_PNG)
+        return True
+
+
+@contextlib.contextmanager
+def _in_temp_dir():
+    """Run in a scratch cwd so logs/ and screenshots/ writes don't touch the repo."""
+    previous = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="govgpt-bench-")
+    os.chdir(scratch)
+    try:
+        yield scratch
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _reference_pair(lang):
+    item = load_test_data()["response_validation"]["common_queries"][0]
+    expected = item["expected_response"][lang][0]
+    # A realistic "close but not identical" answer: sentence order changed
+    sentences = expected.split(". ")
+    return expected, ". ".join(sentences[1:] + sentences[:1])
+
+
+@benchmark("micro", "response_accuracy_checker_local_en", number=20)
+def bench_accuracy_en(options):
+    expected, actual = _reference_pair("en")
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield lambda: response_accuracy_checker(actual, expected, 0.8, scorer=local_similarity)
+
+
+@benchmark("micro", "response_accuracy_checker_local_ar", number=20)
+def bench_accuracy_ar(options):
+    expected, actual = _reference_pair("ar")
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield lambda: response_accuracy_checker(actual, expected, 0.8, scorer=local_similarity)
+
+
+@benchmark("micro", "malicious_response_checker", number=2000)
+def bench_malicious(options):
+    phrases = load_test_data()["security_tests"]["expected_rejection_phrases"]
+    response = _reference_pair("en")[0]  # no rejection phrase, worst case scans all phrases
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield lambda: malicious_response_checker(response, phrases)
+
+
+@benchmark("micro", "normalize_text_ar", number=2000)
+def bench_normalize_ar(options):
+    text = _reference_pair("ar")[0]
+    yield lambda: normalize_text(text)
+
+
+@benchmark("micro", "tokenize_ar", number=2000)
+def bench_tokenize_ar(options):
+    text = _reference_pair("ar")[0]
+    yield lambda: tokenize(text)
+
+
+def _arabic_corpus(target_mb: float) -> list[str]:
+    """Repeat the Arabic reference answers from test data until the corpus reaches target_mb."""
+    queries = load_test_data()["response_validation"]["common_queries"]
+    references = [text for item in queries for text in item["expected_response"]["ar"]]
+    target_bytes = int(target_mb * 1024 * 1024)
+
+    corpus, size = [], 0
+    while size < target_bytes:
+        for text in references:
+            corpus.append(text)
+            size += len(text.encode("utf-8"))
+    return corpus
+
+
+def _over_corpus(func, corpus):
+    def run():
+        for text in corpus:
+            func(text)
+    return run
+
+
+@benchmark("micro", "normalize_text_ar_corpus", repeat=3)
+def bench_normalize_corpus(options):
+    yield _over_corpus(normalize_text, _arabic_corpus(options.corpus_mb))
+
+
+@benchmark("micro", "tokenize_ar_corpus", repeat=3)
+def bench_tokenize_corpus(options):
+    yield _over_corpus(tokenize, _arabic_corpus(options.corpus_mb))
+
+
+@benchmark("micro", "malicious_response_checker_ar_corpus", repeat=3)
+def bench_malicious_corpus(options):
+    phrases = load_test_data()["security_tests"]["expected_rejection_phrases"]
+    corpus = _arabic_corpus(options.corpus_mb)
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield _over_corpus(lambda text: malicious_response_checker(text, phrases), corpus)
+
+
+@benchmark("micro", "load_test_data", number=200)
+def bench_load_test_data(options):
+    yield load_test_data
+
+
+@benchmark("micro", "load_locators", number=2000)
+def bench_load_locators(options):
+    yield load_locators
+
+
+@benchmark("micro", "log_ui_result", number=500)
+def bench_log_ui_result(options):
+    details = "EN response passed.\n" + _reference_pair("en")[0]
+    with _in_temp_dir(), contextlib.redirect_stdout(io.StringIO()):
+        yield lambda: log_ui_result("bench_log", True, details, language="en")
+
+
+@benchmark("micro", "save_screenshot", number=200)
+def bench_save_screenshot(options):
+    driver = _ScreenshotDriver()
+    with _in_temp_dir():
+        yield lambda: save_screenshot(driver, "bench_screenshot_pass")
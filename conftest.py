@@ -1,8 +1,16 @@
 import pytest
 
 from utils.helpers import *
+from utils.replay import HermeticSession, merge_worker_archives
+from utils.browser_profiles import BROWSER_PROFILES
+from utils.browser_pool import BrowserPool, WatchdogLimits
+from utils import live_events
+from utils.language_scheduler import plan as plan_language_order, xdist_groups
 
 
+# Set in pytest_configure: the xdist controller only relays worker events
+_is_xdist_controller = False
+
 # Load locators
 with open("data/locators.json") as f:
     locators = json.load(f)
@@ -35,6 +43,225 @@ def pytest_addoption(parser):
         default=True, 
         help="Run Chrome in headless mode"
     )
+    parser.addoption(
+        "--response-index",
+        action="store",
+        default=DEFAULT_INDEX_PATH,
+        help="SQLite file for the response MinHash/LSH history index (empty string disables)"
+    )
+    parser.addoption(
+        "--base-url",
+        action="store",
+        default="https://govgpt.sandbox.dge.gov.ae/",
+        help="GovGPT instance under test"
+    )
+    parser.addoption(
+        "--record",
+        action="store",
+        default=None,
+        help="Record all browser HTTP traffic to this archive (.jsonl.gz) for later replay"
+    )
+    parser.addoption(
+        "--replay",
+        action="store",
+        default=None,
+        help="Serve a recorded archive from a local server and run the suite against it"
+    )
+    parser.addoption(
+        "--replay-latency",
+        action="store",
+        default=0.0,
+        type=float,
+        help="Latency in ms added to every replayed response (default=0)"
+    )
+    parser.addoption(
+        "--replay-jitter",
+        action="store",
+        default=0.0,
+        type=float,
+        help="Random +/- jitter in ms on top of --replay-latency (default=0)"
+    )
+    parser.addoption(
+        "--browser-profile",
+        action="store",
+        default="full",
+        choices=sorted(BROWSER_PROFILES),
+        help="Default Chrome profile for tests without a browser_profile marker (default=full)"
+    )
+    parser.addoption(
+        "--reuse-browser",
+        action="store_true",
+        default=False,
+        help="Reuse one logged-in browser per worker across tests, recycled by the memory watchdog"
+    )
+    parser.addoption(
+        "--max-tests-per-browser",
+        action="store",
+        default=25,
+        type=int,
+        help="Recycle a reused browser after this many tests (default=25)"
+    )
+    parser.addoption(
+        "--max-dom-nodes",
+        action="store",
+        default=15000,
+        type=int,
+        help="Start a new chat when the page holds more DOM nodes than this (default=15000)"
+    )
+    parser.addoption(
+        "--max-js-heap-mb",
+        action="store",
+        default=512.0,
+        type=float,
+        help="Recycle the browser when used JS heap exceeds this many MB (default=512)"
+    )
+    parser.addoption(
+        "--max-rss-mb",
+        action="store",
+        default=1500.0,
+        type=float,
+        help="Recycle the browser when Chrome RSS exceeds this many MB, Linux only (default=1500)"
+    )
+    parser.addoption(
+        "--live-events",
+        action="store_true",
+        default=False,
+        help="Start a local live dashboard and stream results, metrics and screenshots to it"
+    )
+    parser.addoption(
+        "--live-events-port",
+        action="store",
+        default=live_events.DEFAULT_PORT,
+        type=int,
+        help=f"Port for --live-events (default={live_events.DEFAULT_PORT})"
+    )
+    parser.addoption(
+        "--live-events-url",
+        action="store",
+        default=None,
+        help="Publish to an already running event server (python -m utils.live_events)"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "ui: chatbot UI behavior test")
+    config.addinivalue_line(
+        "markers",
+        "browser_profile(name): run with a named Chrome profile from utils/browser_profiles.py, e.g. 'lean'"
+    )
+    config.addinivalue_line(
+        "markers",
+        "language(code): test needs the UI in this language; used by the language-aware ordering"
+    )
+
+    # Live events: the controller owns the server, every test process publishes
+    global _is_xdist_controller
+    is_worker = hasattr(config, "workerinput")
+    _is_xdist_controller = not is_worker and config.getoption("dist", "no") != "no"
+
+    # Reused browsers only save language switches if each language group stays on one worker
+    if _is_xdist_controller and config.getoption("reuse_browser") and not config.option.collectonly \
+            and config.getoption("dist") != "loadgroup":
+        raise pytest.UsageError("--reuse-browser with -n needs --dist loadgroup to keep each UI language group on one worker")
+    if config.getoption("live_events") and not is_worker:
+        config._live_event_server = live_events.EventServer(port=config.getoption("live_events_port")).start()
+        os.environ[live_events.ENV_URL] = config._live_event_server.url
+        print(f"\n[Live Events] Dashboard at {config._live_event_server.url}/")
+    elif config.getoption("live_events_url") and not is_worker:
+        os.environ[live_events.ENV_URL] = config.getoption("live_events_url")
+    live_events.configure(os.environ.get(live_events.ENV_URL))
+
+    # One network-degradation run id for the whole run, inherited by xdist workers
+    if not is_worker:
+        current_run_id()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if hasattr(session.config, "workerinput"):
+        session.config.workeroutput["language_plan"] = getattr(session.config, "_language_plan", None)
+        session.config.workeroutput["language_switches"] = dict(LANGUAGE_SWITCHES)
+
+    # Workers record to their own part files (see HermeticSession); the controller merges them
+    record_path = session.config.getoption("record")
+    if record_path and not hasattr(session.config, "workerinput"):
+        merge_worker_archives(record_path)
+
+
+def pytest_unconfigure(config):
+    live_events.shutdown()
+    server = getattr(config, "_live_event_server", None)
+    if server is not None:
+        server.stop()
+
+
+def pytest_runtest_logstart(nodeid, location):
+    # Under xdist the controller re-fires this for every worker item; workers already published it
+    if _is_xdist_controller:
+        return
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    live_events.publish("worker", coalesce=f"worker:{worker}", status="running", test=nodeid)
+
+
+def pytest_runtest_logreport(report):
+    # Under xdist the controller sees copies of worker reports; workers already published them
+    if getattr(report, "node", None) is not None:
+        return
+    if report.when == "call" or (report.when == "setup" and not report.passed):
+        live_events.publish("test", test=report.nodeid, outcome=report.outcome, duration=report.duration)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(session, config, items):
+    """
+    Keep only ui_tests.languages items. With --reuse-browser, group them by language and split each
+    language into per-worker xdist_groups, so every worker gets work and its browser switches
+    language as few times as possible. Runs before xdist reads the xdist_group marks.
+    """
+    reuse = config.getoption("reuse_browser")
+    ordered, deselected, stats = plan_language_order(items, test_data["ui_tests"]["languages"], group=reuse)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    if reuse:
+        # Every worker collects the same items with the same worker count, so the groups agree
+        workers = config.workerinput["workercount"] if hasattr(config, "workerinput") else 1
+        for item, group in xdist_groups(ordered, workers):
+            item.add_marker(pytest.mark.xdist_group(group))
+    items[:] = ordered
+    config._language_plan = stats
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Under xdist only workers collect and switch: take their plan and add up their switches."""
+    output = getattr(node, "workeroutput", {})
+    if output.get("language_plan") and not getattr(node.config, "_language_plan", None):
+        node.config._language_plan = output["language_plan"]
+    for key, count in output.get("language_switches", {}).items():
+        LANGUAGE_SWITCHES[key] += count
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    stats = getattr(config, "_language_plan", None)
+    performed, skipped = LANGUAGE_SWITCHES["performed"], LANGUAGE_SWITCHES["skipped"]
+    if not stats or not (stats["language_items"] or performed or skipped):
+        return
+    per_language = ", ".join(f"{lang}: {count}" for lang, count in stats["per_language"].items())
+    line = (
+        f"{stats['language_items']} language-dependent items ({per_language}), "
+        + ("grouped by language" if stats["grouped"] else "in collection order, browsers are not reused")
+    )
+    if not config.option.collectonly:
+        line += f"; {performed} language switches made, {skipped} skipped as the browser was already in that language"
+    terminalreporter.write_sep("-", "language scheduling")
+    terminalreporter.write_line(line)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Expose each phase's report on the item so fixtures can see the test outcome."""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
 
 # ---------------------------
 # Fixtures to access options
@@ -51,10 +278,36 @@ def query_limit(request):
 def threshold(request):
     return request.config.getoption("threshold")
 
+@pytest.fixture(scope="session")
+def response_index(request):
+    """History index of captured responses, shared by all tests in the session."""
+    path = request.config.getoption("response_index")
+    if not path:
+        yield None
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    index = ResponseIndex(path, run_id=datetime.now().strftime("%Y%m%d_%H%M%S"))
+    yield index
+    index.close()
+
+@pytest.fixture(scope="session")
+def hermetic(request):
+    """Live, record or replay mode for the session (see utils/replay.py)."""
+    session = HermeticSession(
+        base_url=request.config.getoption("base_url"),
+        record_path=request.config.getoption("record"),
+        replay_path=request.config.getoption("replay"),
+        latency_ms=request.config.getoption("replay_latency"),
+        jitter_ms=request.config.getoption("replay_jitter"),
+        worker=os.environ.get("PYTEST_XDIST_WORKER"),
+    ).start()
+    yield session
+    session.stop()
+
 
 def pytest_generate_tests(metafunc):
     """
-    Dynamically parametrize tests that request query_item_en or query_item_ar fixtures.
+    Dynamically parametrize tests that request query_item_en, query_item_ar, network or device fixtures.
     This ensures pytest creates only the desired number of test items, no skips.
     """
     if "query_item_en" in metafunc.fixturenames:
@@ -69,54 +322,87 @@ def pytest_generate_tests(metafunc):
         capped = min(max(0, limit), len(all_queries))
         metafunc.parametrize("query_item_ar", all_queries[:capped])
 
+    if "network_profile" in metafunc.fixturenames:
+        profiles = load_test_data()["network_tests"]["profiles"]
+        metafunc.parametrize("network_profile", profiles, ids=[p["name"] for p in profiles])
+
+    if "network_lang" in metafunc.fixturenames:
+        metafunc.parametrize("network_lang", load_test_data()["ui_tests"]["languages"])
+
+    if "device" in metafunc.fixturenames:
+        devices = load_test_data()["ui_tests"]["devices"]
+        metafunc.parametrize("device", devices, ids=[d["name"] for d in devices])
+
 # ---------------------------
-# WebDriver fixture
+# WebDriver fixtures
 # ---------------------------
+@pytest.fixture(scope="session")
+def browser_pool(request, hermetic):
+    """Per-worker browsers with the memory watchdog; reports high-water marks at session end."""
+    config = request.config
+    pool = BrowserPool(
+        hermetic,
+        locators,
+        test_data["credentials"],
+        headless=config.getoption("--headless"),
+        limits=WatchdogLimits(
+            max_tests_per_browser=config.getoption("max_tests_per_browser"),
+            max_dom_nodes=config.getoption("max_dom_nodes"),
+            max_js_heap_mb=config.getoption("max_js_heap_mb"),
+            max_rss_mb=config.getoption("max_rss_mb"),
+        ),
+    )
+    yield pool
+    pool.close()
+
+
+def _test_failed(request):
+    report = getattr(request.node, "rep_call", None)
+    return report is None or report.failed
+
+
 @pytest.fixture(scope="function")
-def driver(headless_mode):
-    """Launch Chrome WebDriver and log in to dashboard."""
-    options = webdriver.ChromeOptions()
-    options.add_argument("--window-size=1920,1080")
-    if headless_mode:
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-
-    driver.get("https://govgpt.sandbox.dge.gov.ae/")
-    wait = WebDriverWait(driver, 10)
-
-    try:
-        # Click "Login with Credentials"
-        login_btn = wait.until(
-            EC.element_to_be_clickable((By.XPATH, locators["login_page"]["login_credentials_button"]))
-        )
-        login_btn.click()
-
-        # Enter Email
-        email_input = wait.until(
-            EC.presence_of_element_located((By.ID, locators["login_page"]["email_input"]))
-        )
-        email_input.send_keys(test_data["credentials"]["email"])
-
-        # Enter Password
-        password_input = driver.find_element(By.ID, locators["login_page"]["password_input"])
-        password_input.send_keys(test_data["credentials"]["password"])
-
-        # Click Sign In
-        driver.find_element(By.CSS_SELECTOR, locators["login_page"]["sign_in_button"]).click()
-
-        # Wait for Dashboard greeting
-        wait.until(
-            EC.presence_of_element_located((By.XPATH, locators["dashboard_page"]["welcome_message"]))
-        )
-
-    except Exception:
-        driver.quit()
-        raise
+def driver(request, headless_mode, hermetic):
+    """Logged-in browser for one test: fresh by default, pooled with --reuse-browser."""
+    marker = request.node.get_closest_marker("browser_profile")
+    profile = marker.args[0] if marker else request.config.getoption("browser_profile")
+
+    if request.config.getoption("reuse_browser"):
+        browser_pool = request.getfixturevalue("browser_pool")
+        driver = browser_pool.acquire(profile)
+        lang = item_language(request.node)
+        if lang:
+            # A reused browser may still be in the previous test's language
+            try:
+                ensure_language(driver, locators, lang)
+            except Exception:
+                browser_pool.invalidate(profile)
+                raise
+        yield driver
+        if _test_failed(request):
+            browser_pool.invalidate(profile)
+        else:
+            browser_pool.release(driver, profile, reset=True)
+        return
 
+    driver = launch_driver(hermetic, locators, test_data["credentials"], headless_mode, profile)
     yield driver
+    hermetic.capture(driver)
     driver.quit()
+
+
+@pytest.fixture(scope="function")
+def matrix_driver(request, browser_pool):
+    """
+    Per-worker browser reused across device-matrix items.
+    Devices are applied with CDP emulation (see emulate_device), not new windows.
+    It has its own pool slot, so its emulated state never reaches other tests.
+    """
+    profile = request.config.getoption("browser_profile")
+    key = f"matrix:{profile}"
+    driver = browser_pool.acquire(profile, key)
+    yield driver
+    if _test_failed(request):
+        browser_pool.invalidate(key)
+    else:
+        browser_pool.release(driver, key)
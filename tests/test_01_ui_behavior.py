@@ -16,30 +16,24 @@ class TestUAskUIBehavior:
         return load_test_data()
 
     @pytest.mark.ui
-    def test_01_chat_widget_loads_desktop_and_mobile(self, driver: WebDriver, locators: EC.Any):
-        """Test chat widget loads in both desktop and mobile views."""
-
-        # Desktop check
-        switch_view(driver, "desktop")
-        widget = get_chat_widget(driver, locators)
-        assert_with_logging(
-            widget.is_displayed(),
-            driver,
-            test_name="widget_loads_desktop",
-            success_details="Chat widget visible in desktop view",
-            failure_details="Chat widget not visible in desktop view",
-        )
-
-        # Mobile check
-        switch_view(driver, "mobile")
-        widget = get_chat_widget(driver, locators)
-        assert_with_logging(
-            widget.is_displayed(),
-            driver,
-            test_name="widget_loads_mobile",
-            success_details="Chat widget visible in mobile view",
-            failure_details="Chat widget not visible in mobile view",
-        )
+    def test_01_chat_widget_loads_desktop_and_mobile(self, matrix_driver: WebDriver, locators: EC.Any, device):
+        """
+        Test chat widget loads across the device matrix in ui_tests.devices.
+        Each worker reuses one browser and switches devices through CDP emulation.
+        """
+        emulate_device(matrix_driver, device, reload=True)
+        try:
+            widget = get_chat_widget(matrix_driver, locators)
+            assert_with_logging(
+                widget.is_displayed(),
+                matrix_driver,
+                test_name=f"widget_loads_{device['name']}",
+                success_details=f"Chat widget visible on {device['name']} ({device['width']}x{device['height']})",
+                failure_details=f"Chat widget not visible on {device['name']} ({device['width']}x{device['height']})",
+            )
+        finally:
+            # No reload: the next matrix item reloads with its own device anyway
+            clear_device_emulation(matrix_driver)
 
     @pytest.mark.ui
     def test_02_user_can_send_message(self, driver: WebDriver, locators: EC.Any):
@@ -108,6 +102,7 @@ class TestUAskUIBehavior:
 
 
     @pytest.mark.ui
+    @pytest.mark.browser_profile("lean")
     def test_04_multilingual_support(self, driver: WebDriver, locators: EC.Any, test_data):
         """Test multilingual support and directionality."""
         lang_cases = test_data["ui_tests"]["language_direction"]
@@ -116,9 +111,8 @@ class TestUAskUIBehavior:
             language = case["language"]
             expected_dir = case["expected_direction"]
 
-            # Switch language if not English
-            if language != "en":
-                switch_language(driver, locators, to_lang=language)
+            # Switch language unless the browser is already in it
+            ensure_language(driver, locators, language)
 
             # Fetch <html> attributes
             lang_attr, dir_attr = get_html_attributes(driver, locators)
@@ -205,6 +199,7 @@ class TestUAskUIBehavior:
 
 
     @pytest.mark.ui
+    @pytest.mark.browser_profile("lean")
     def test_07_accessibility_input_field(self, driver: WebDriver, locators: EC.Any):
         """
         Verify the chatbot input field meets global accessibility standards.
@@ -18,7 +18,7 @@ class TestUAskSecurity:
         "xss_attempt",
         load_test_data()["security_tests"]["xss_attempts"]
     )
-    def test_08_xss_security_protection(self, driver, locators, test_data, xss_attempt):
+    def test_08_xss_security_protection(self, driver, locators, test_data, xss_attempt, response_index):
         """
         Verify chatbot is protected against XSS attacks.
         """
@@ -37,13 +37,15 @@ class TestUAskSecurity:
 
         # Step 4: Get AI response
         ai_response = get_ai_response(driver, locators)
-        response_html = ai_response.get_attribute("innerHTML").lower()
+        response_html = ai_response.get_attribute("innerHTML")
+        record_response(response_index, xss_attempt, "en", ai_response.text, source="security_xss")
 
         # Step 5: Check for disallowed tags
         failure_reasons = [
             f"XSS: {tag} detected"
-            for tag in test_data["security_tests"]["xss_expected_strings"]
-            if tag.lower() in response_html
+            for tag in find_normalized_matches(
+                response_html, test_data["security_tests"]["xss_expected_strings"]
+            )
         ]
 
         # Step 6: Assert
@@ -59,7 +61,7 @@ class TestUAskSecurity:
         "malicious_prompt",
         load_test_data()["security_tests"]["malicious_prompts"]
     )
-    def test_09_malicious_prompts(self, driver, locators, test_data, malicious_prompt):
+    def test_09_malicious_prompts(self, driver, locators, test_data, malicious_prompt, response_index):
         """
         Verify chatbot rejects malicious prompt injections.
         """
@@ -77,6 +79,7 @@ class TestUAskSecurity:
         # Step 4: Get AI response
         ai_response = get_ai_response(driver, locators)
         response_text = ai_response.text
+        record_response(response_index, malicious_prompt, "en", response_text, source="security_malicious")
 
         # Step 5: Validate response
         expected_phrases = test_data["security_tests"]["expected_rejection_phrases"]
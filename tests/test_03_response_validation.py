@@ -16,7 +16,8 @@ class TestGPTResponseValidation:
         return load_test_data()["response_validation"]["common_queries"]
 
     @pytest.mark.ui
-    def test_11_english_query_response(self, driver: WebDriver, locators, query_item_en, threshold):
+    @pytest.mark.browser_profile("lean")
+    def test_11_english_query_response(self, driver: WebDriver, locators, query_item_en, threshold, response_index):
         """
         Validate a single English AI query item. pytest_generate_tests will create
         as many test instances as the CLI --query-limit requests, no skips.
@@ -28,67 +29,74 @@ class TestGPTResponseValidation:
             [query_item_en],
             lang="en",
             num_queries=1,
-            threshold=threshold
+            threshold=threshold,
+            response_index=response_index
         )
 
     @pytest.mark.ui
-    def test_12_arabic_query_response(self, driver: WebDriver, locators, query_item_ar, threshold):
+    @pytest.mark.browser_profile("lean")
+    def test_12_arabic_query_response(self, driver: WebDriver, locators, query_item_ar, threshold, response_index):
         """
         Validate a single Arabic AI query item. the session is reused per test instance.
         """
-
         validate_language_based_responses(
             driver,
             locators,
             [query_item_ar],
             lang="ar",
             num_queries=1,
-            threshold=threshold
+            threshold=threshold,
+            response_index=response_index
         )
 
     
     @pytest.mark.ui
-    def test_10_network_throttle_fallback(self, driver: WebDriver, locators):
-        """Test network throttling/fallback messages for offline scenario."""
-        test_name = "network_failure_fallback"
-        passed = True
-        failure_details = ""
-
-        input_field = setup_chat(driver, locators)
-
-        driver.execute_cdp_cmd("Network.enable", {})
-        driver.execute_cdp_cmd("Network.emulateNetworkConditions", {
-            "offline": True,
-            "latency": 0,
-            "downloadThroughput": 0,
-            "uploadThroughput": 0
-        })
-
-        # Step 3: Send a valid message while offline
-        input_field.send_keys("test network failure" + Keys.ENTER)
+    @pytest.mark.browser_profile("lean")
+    def test_10_network_throttle_fallback(self, driver: WebDriver, locators, network_profile, network_lang):
+        """
+        Run a representative query under a network profile from network_tests.profiles and
+        record TTFT, completion time and fallback behavior for the degradation curve.
+        Profiles expecting "complete" must finish within their timeout; "fallback" profiles
+        must show the fallback UI (error message or retry control) instead of a completed response.
+        """
+        profile_name = network_profile["name"]
+        test_name = f"network_{profile_name}_{network_lang}"
+        message = load_test_data()["response_validation"]["common_queries"][0][network_lang]
 
+        # The query must go out from a UI in its own language (no-op if already switched)
+        ensure_language(driver, locators, network_lang)
+        setup_chat(driver, locators)
+        apply_network_profile(driver, network_profile)
         try:
-            wait_for_shimmer(driver, locators, timeout=15)
-            # If shimmer completes → fail in this test
-            passed = False
-            failure_details = "Shimmer appeared in offline mode, expected fallback instead."
-        except AssertionError:
-            # Shimmer did not appear/disappear properly → PASS for offline case
-            passed = True
+            result = measure_query(driver, locators, message, timeout=network_profile["timeout_s"])
+        finally:
+            reset_network(driver)
+
+        completed = result["completion_s"] is not None
+        fallback_shown = result["fallback_s"] is not None
+        if network_profile["expect"] == "complete":
+            passed = completed
+        else:
+            passed = fallback_shown and not completed
+        record_network_result(profile_name, network_lang, result, passed)
 
-        # Step 5: Restore network
-        driver.execute_cdp_cmd("Network.emulateNetworkConditions", {
-            "offline": False,
-            "latency": 0,
-            "downloadThroughput": -1,
-            "uploadThroughput": -1
-        })
+        metrics = (
+            f"TTFT: {result['ttft_s']}s | Completion: {result['completion_s']}s | "
+            f"Fallback: {result['fallback_s']}s | "
+            f"Shimmer seen: {result['shimmer_seen']} | Shimmer stuck: {result['shimmer_stuck']}"
+        )
+        if network_profile["expect"] == "complete":
+            failure_details = f"No completed response within {network_profile['timeout_s']}s under {profile_name}. {metrics}"
+        elif completed:
+            failure_details = f"Response completed under {profile_name}, expected fallback. {metrics}"
+        else:
+            failure_details = f"No error message or retry control shown under {profile_name}. {metrics}"
 
-        # Step 6: Assert final result
         assert_with_logging(
             passed,
             driver,
             test_name=test_name,
-            success_details="Offline network fallback behavior verified",
-            failure_details=failure_details or "Network fallback validation failed"
-        )
\ No newline at end of file
+            success_details=f"Network profile '{profile_name}' behaved as expected. {metrics}",
+            failure_details=failure_details,
+            language=network_lang
+        )
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils.language_scheduler import plan, item_language, xdist_group_name, xdist_groups
+
+
+class FakeItem:
+    """Just enough of a pytest item for item_language()."""
+
+    def __init__(self, name, fixturenames=(), language=None, params=None):
+        self.name = name
+        self.fixturenames = fixturenames
+        self._marker = pytest.mark.language(language).mark if language else None
+        if params is not None:
+            self.callspec = SimpleNamespace(params=params)
+
+    def get_closest_marker(self, name):
+        return self._marker if name == "language" else None
+
+    def __repr__(self):
+        return self.name
+
+
+def names(items):
+    return [item.name for item in items]
+
+
+class TestLanguageScheduler:
+
+    @pytest.fixture
+    def items(self):
+        return [
+            FakeItem("ui_1"),
+            FakeItem("ar_1", fixturenames=("driver", "query_item_ar")),
+            FakeItem("en_1", fixturenames=("driver", "query_item_en")),
+            FakeItem("fr_1", language="fr"),
+            FakeItem("ar_2", language="ar"),
+            FakeItem("ui_2"),
+            FakeItem("en_2", fixturenames=("query_item_en",)),
+        ]
+
+    def test_item_language(self, items):
+        assert [item_language(item) for item in items] == [None, "ar", "en", "fr", "ar", None, "en"]
+
+    def test_item_language_from_network_lang_param(self):
+        item = FakeItem("net_ar", fixturenames=("driver", "network_profile", "network_lang"),
+                        params={"network_profile": {"name": "3g"}, "network_lang": "ar"})
+        assert item_language(item) == "ar"
+        assert item_language(FakeItem("net", params={"network_profile": {"name": "3g"}})) is None
+
+    def test_groups_by_language_in_configured_order(self, items):
+        ordered, deselected, _ = plan(items, ["en", "ar"])
+        assert names(ordered) == ["ui_1", "ui_2", "en_1", "en_2", "ar_1", "ar_2"]
+        assert names(deselected) == ["fr_1"]
+
+    def test_keeps_collection_order_without_grouping(self, items):
+        ordered, deselected, _ = plan(items, ["en", "ar"], group=False)
+        assert names(ordered) == ["ui_1", "ar_1", "en_1", "ar_2", "ui_2", "en_2"]
+        assert names(deselected) == ["fr_1"]
+
+    def test_deselects_languages_not_configured(self, items):
+        ordered, deselected, stats = plan(items, ["ar"])
+        assert names(ordered) == ["ui_1", "ui_2", "ar_1", "ar_2"]
+        assert names(deselected) == ["en_1", "fr_1", "en_2"]
+        assert stats["deselected"] == 3
+
+    def test_stats(self, items):
+        _, _, stats = plan(items, ["en", "ar"])
+        assert stats == {
+            "language_items": 4,
+            "deselected": 1,
+            "per_language": {"en": 2, "ar": 2},
+            "grouped": True,
+        }
+
+    def test_xdist_group_name(self):
+        assert xdist_group_name("ar", 2) == "language-ar-2"
+
+    def test_xdist_groups_split_languages_across_workers(self):
+        items = [FakeItem("ui")] + [FakeItem(f"en_{i}", language="en") for i in range(6)] \
+            + [FakeItem(f"ar_{i}", language="ar") for i in range(2)]
+        ordered, _, _ = plan(items, ["en", "ar"])
+        groups = [(item.name, group) for item, group in xdist_groups(ordered, workers=4)]
+        assert groups == [
+            ("en_0", "language-en-0"), ("en_1", "language-en-0"),
+            ("en_2", "language-en-1"), ("en_3", "language-en-1"),
+            ("en_4", "language-en-2"), ("en_5", "language-en-2"),
+            ("ar_0", "language-ar-0"), ("ar_1", "language-ar-0"),
+        ]
+
+    def test_xdist_groups_one_per_language_without_spare_workers(self, items):
+        ordered, _, _ = plan(items, ["en", "ar"])
+        groups = {group for _, group in xdist_groups(ordered, workers=1)}
+        assert groups == {"language-en-0", "language-ar-0"}
+
+    def test_xdist_groups_never_exceed_items(self, items):
+        ordered, _, _ = plan(items, ["en", "ar"])
+        assert len({group for _, group in xdist_groups(ordered, workers=16)}) == 4
@@ -0,0 +1,78 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils.replay import Exchange, ReplayArchive, ReplayServer, merge_worker_archives, worker_archive_path
+
+
+ORIGIN = "https://govgpt.example"
+CHAT_URL = f"{ORIGIN}/api/chat/completions"
+
+
+def chat_body(question, chat_id, timestamp):
+    return json.dumps({
+        "chat_id": chat_id,
+        "messages": [{"id": chat_id, "role": "user", "content": question, "timestamp": timestamp}],
+    }).encode()
+
+
+def chat_exchange(question, answer, chat_id, timestamp, started=0.0):
+    return Exchange(
+        method="POST",
+        url=CHAT_URL,
+        status=200,
+        headers=[("Content-Type", "application/json")],
+        body=json.dumps({"answer": answer}).encode(),
+        request_body=chat_body(question, chat_id, timestamp),
+        started=started,
+    )
+
+
+class TestReplay:
+
+    @pytest.fixture
+    def server(self):
+        archive = ReplayArchive()
+        archive.add(chat_exchange("How do I renew my Emirates ID?", "renew", "0f8fad5b-d9cb-469f-a165-70867728950e", 1700000000))
+        archive.add(chat_exchange("What is a golden visa?", "golden", "7c9e6679-7425-40de-944b-e07fc1f90ae7", 1700000005))
+        archive.add(chat_exchange("What is a golden visa?", "golden again", "16fd2706-8baf-433b-82eb-8c7fada847da", 1700000009))
+        server = ReplayServer(archive, ORIGIN).start()
+        yield server
+        server.stop()
+
+    def ask(self, server, question, chat_id, timestamp):
+        request = urllib.request.Request(
+            f"{server.url}/api/chat/completions",
+            data=chat_body(question, chat_id, timestamp),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.load(response)["answer"]
+
+    def test_chat_posts_are_matched_by_question_not_order(self, server):
+        assert self.ask(server, "What is a golden visa?", "a3bb189e-8bf9-3888-9912-ace4e6543002", 1760000000123) == "golden"
+        assert self.ask(server, "How do I renew my Emirates ID?", "e6fa6f2b-2d8c-4a3e-9b53-5c1bb9a2f0d1", 1760000000456) == "renew"
+        assert server.served == 2
+
+    def test_repeats_of_the_same_request_are_served_in_recorded_order(self, server):
+        answers = [self.ask(server, "What is a golden visa?", "a3bb189e-8bf9-3888-9912-ace4e6543002", 1760000000) for _ in range(3)]
+        assert answers == ["golden", "golden again", "golden again"]
+
+    def test_unrecorded_question_is_a_miss(self, server):
+        with pytest.raises(urllib.error.HTTPError):
+            self.ask(server, "Tell me a joke", "a3bb189e-8bf9-3888-9912-ace4e6543002", 1760000000)
+        assert server.missed == 1
+
+    def test_merge_keeps_request_order_across_workers(self, tmp_path):
+        path = str(tmp_path / "session.jsonl.gz")
+        for worker, started in (("gw0", (1.0, 3.0)), ("gw1", (2.0, 4.0))):
+            part = ReplayArchive()
+            for value in started:
+                part.add(chat_exchange("What is a golden visa?", f"answer {value}", "7c9e6679-7425-40de-944b-e07fc1f90ae7", 1700000000, started=value))
+            part.save(worker_archive_path(path, worker))
+
+        assert merge_worker_archives(path) == 2
+        (recorded,) = ReplayArchive.load(path).exchanges.values()
+        assert [json.loads(e.body)["answer"] for e in recorded] == ["answer 1.0", "answer 2.0", "answer 3.0", "answer 4.0"]
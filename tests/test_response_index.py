@@ -0,0 +1,85 @@
+import pytest
+
+from utils.response_index import ResponseIndex, MinHasher, estimate_similarity, shingle
+
+
+CANNED = "I'm sorry, I can only help with questions about UAE government services."
+ANSWER = (
+    "You can renew your Emirates ID online through the ICP smart services portal. "
+    "Log in with UAE Pass, choose renewal, upload a photo and pay the fees."
+)
+OTHER_ANSWER = (
+    "Golden visa holders may sponsor family members of any age and domestic workers, "
+    "and the visa stays valid even if the holder lives abroad for more than six months."
+)
+
+
+class TestResponseIndex:
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = ResponseIndex(str(tmp_path / "index.sqlite"), run_id="test")
+        yield index
+        index.close()
+
+    def test_minhash_estimates_jaccard(self):
+        hasher = MinHasher()
+        same = estimate_similarity(hasher.signature(shingle(ANSWER)), hasher.signature(shingle(ANSWER.upper())))
+        different = estimate_similarity(hasher.signature(shingle(ANSWER)), hasher.signature(shingle(OTHER_ANSWER)))
+        assert same == 1.0
+        assert different < 0.2
+
+    def test_repeated_answer_is_not_drift(self, index):
+        assert index.add("How do I renew my Emirates ID?", "en", ANSWER, "test").previous_similarity is None
+        result = index.add("how do I renew my emirates ID?", "en", ANSWER, "test")
+        assert result.previous_similarity == 1.0
+        assert not result.drifted
+        assert index.drift_report() == []
+
+    def test_changed_answer_is_reported_as_drift(self, index):
+        index.add("How do I renew my Emirates ID?", "en", ANSWER, "test")
+        result = index.add("How do I renew my Emirates ID?", "en", OTHER_ANSWER, "test")
+        assert result.drifted
+        report = index.drift_report()
+        assert [(question, lang) for question, lang, _ in report] == [("How do I renew my Emirates ID?", "en")]
+        assert report[0][2] < index.drift_threshold
+
+    def test_same_answer_to_different_questions(self, index):
+        index.add("What is the weather today?", "en", CANNED, "test")
+        index.add("Tell me a joke", "en", CANNED, "test")
+        index.add("Who won the match?", "ar", CANNED, "test")  # other language, not a duplicate
+        result = index.add("Write me a poem", "en", CANNED, "test")
+        index.add("How do I renew my Emirates ID?", "en", ANSWER, "test")
+
+        assert result.duplicate_questions == ["Tell me a joke", "What is the weather today?"]
+        assert index.duplicate_clusters() == [["Tell me a joke", "What is the weather today?", "Write me a poem"]]
+
+    def test_buckets_hold_only_latest_answer_per_question(self, index):
+        for _ in range(5):
+            index.add("What is the weather today?", "en", CANNED, "test")
+            index.add("What is the weather today?", "ar", CANNED, "test")
+        (responses,) = index.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        (bucket_rows,) = index.conn.execute("SELECT COUNT(*) FROM lsh_buckets").fetchone()
+        assert responses == 10
+        assert bucket_rows == 2 * index.bands
+        assert len(index.candidates(index.signature_for(CANNED))) == 2
+
+    def test_legacy_buckets_are_pruned_once(self, tmp_path):
+        path = str(tmp_path / "index.sqlite")
+        index = ResponseIndex(path, run_id="test")
+        for _ in range(3):
+            index.add("What is the weather today?", "en", CANNED, "test")
+        # Simulate an index from before buckets held only the latest answer
+        index.conn.executemany(
+            "INSERT INTO lsh_buckets (bucket, response_id) VALUES (?, ?)", [(1, 1), (2, 2)]
+        )
+        index.conn.execute("PRAGMA user_version = 0")
+        index.conn.commit()
+        index.close()
+
+        index = ResponseIndex(path, run_id="test")
+        (stale,) = index.conn.execute("SELECT COUNT(*) FROM lsh_buckets WHERE response_id < 3").fetchone()
+        (version,) = index.conn.execute("PRAGMA user_version").fetchone()
+        index.close()
+        assert stale == 0
+        assert version == 1
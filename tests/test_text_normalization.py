@@ -0,0 +1,42 @@
+import pytest
+
+from utils.text_normalization import normalize_text, tokenize, contains_normalized, find_normalized_matches
+
+
+class TestTextNormalization:
+
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            ("I’m here", "i'm here"),                                # curly apostrophe
+            ("“Quoted” – text", '"quoted" - text'),         # curly quotes, en dash
+            ("أإآٱ", "اااا"),     # alef variants
+            ("على", "علي"),                 # alef maqsura -> yaa
+            ("مدرسة", "مدرسه"),  # taa marbuta -> haa
+            ("كـــتاب", "كتاب"),  # tatweel
+            ("مَرْحَبًا", "مرحبا"),  # diacritics
+            ("١٢٣ ۴۵", "123 45"),                # Arabic-Indic digits
+            ("٪٥٫٥", "%5.5"),                         # Arabic percent / decimal separator
+            ("  A​B ‏\n  C  ", "ab c"),                         # invisible chars, whitespace
+            ("", ""),
+            (None, ""),
+        ],
+    )
+    def test_normalize_text(self, raw, expected):
+        assert normalize_text(raw) == expected
+
+    def test_tokenize_keeps_apostrophes_and_numbers(self):
+        assert tokenize("Dubai’s population is 3,600,000 (٥٫٥%)") == [
+            "dubai's", "population", "is", "3,600,000", "5.5",
+        ]
+
+    def test_contains_normalized(self):
+        assert contains_normalized("<p>I’M SORRY, I can’t help</p>", "i'm sorry")
+        assert contains_normalized("لا يمكنني المساعدة", "المساعده")
+        assert not contains_normalized("anything", "")
+        assert not contains_normalized(None, "x")
+
+    def test_find_normalized_matches_returns_original_needles(self):
+        needles = ["I can’t", "<script>", "إلى"]
+        haystack = "I CAN'T do that. &lt;script&gt; الي الموقع"
+        assert find_normalized_matches(haystack, needles) == ["I can’t", "إلى"]
@@ -0,0 +1,199 @@
+"""
+Per-worker browser reuse with a memory watchdog.
+
+Between tests the watchdog samples JS heap and DOM node counts through CDP
+Performance.getMetrics (plus Chrome's RSS on Linux) and decides whether the
+browser can be handed to the next test as is, needs a fresh chat (DOM has
+grown too large), or must be recycled (memory or max-tests limit reached).
+High-water marks are reported per worker when the session ends.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+
+from utils.helpers import launch_driver
+
+
+KEEP, NEW_CHAT, RECYCLE = "keep", "new_chat", "recycle"
+
+
+@dataclass
+class WatchdogLimits:
+    max_tests_per_browser: int = 25
+    max_dom_nodes: int = 15000
+    max_js_heap_mb: float = 512.0
+    max_rss_mb: float = 1500.0
+
+
+@dataclass
+class WatchdogStats:
+    samples: int = 0
+    new_chats: int = 0
+    recycles: int = 0
+    peak: dict = field(default_factory=lambda: {"js_heap_mb": 0.0, "dom_nodes": 0, "rss_mb": 0.0})
+
+
+def _chrome_rss_mb(driver) -> float | None:
+    """Sum RSS of chromedriver's descendant processes (Linux /proc only)."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None or not os.path.isdir("/proc"):
+        return None
+
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm may contain spaces; ppid is the 2nd field after the closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total_kb, stack = 0, list(children.get(process.pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+class MemoryWatchdog:
+    """Samples browser memory and decides what to do with the browser before the next test."""
+
+    def __init__(self, limits: WatchdogLimits | None = None):
+        self.limits = limits or WatchdogLimits()
+        self.stats = WatchdogStats()
+
+    def sample(self, driver) -> dict:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = {
+            m["name"]: m["value"]
+            for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        }
+        sample = {
+            "js_heap_mb": metrics.get("JSHeapUsedSize", 0) / (1024 * 1024),
+            "dom_nodes": int(metrics.get("Nodes", 0)),
+            "rss_mb": _chrome_rss_mb(driver),
+        }
+        self.stats.samples += 1
+        for key, value in sample.items():
+            if value is not None and value > self.stats.peak[key]:
+                self.stats.peak[key] = value
+        return sample
+
+    def decide(self, sample: dict, tests_served: int) -> tuple[str, str]:
+        """Return (action, reason)."""
+        limits = self.limits
+        if tests_served >= limits.max_tests_per_browser:
+            return RECYCLE, f"served {tests_served} tests"
+        if sample["js_heap_mb"] > limits.max_js_heap_mb:
+            return RECYCLE, f"JS heap {sample['js_heap_mb']:.0f}MB > {limits.max_js_heap_mb:.0f}MB"
+        if sample["rss_mb"] is not None and sample["rss_mb"] > limits.max_rss_mb:
+            return RECYCLE, f"RSS {sample['rss_mb']:.0f}MB > {limits.max_rss_mb:.0f}MB"
+        if sample["dom_nodes"] > limits.max_dom_nodes:
+            return NEW_CHAT, f"{sample['dom_nodes']} DOM nodes > {limits.max_dom_nodes}"
+        return KEEP, ""
+
+
+class BrowserPool:
+    """
+    One logged-in browser per key for this worker (the profile name unless a
+    caller needs a separate slot), checked by the watchdog every time a test
+    hands it back.
+    """
+
+    def __init__(self, hermetic, locators, credentials, headless: bool = True,
+                 limits: WatchdogLimits | None = None, report_dir: str = "logs"):
+        self.hermetic = hermetic
+        self.locators = locators
+        self.credentials = credentials
+        self.headless = headless
+        self.watchdog = MemoryWatchdog(limits)
+        self.report_dir = report_dir
+        self.worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        self._browsers: dict[str, dict] = {}
+
+    def acquire(self, profile: str = "full", key: str | None = None):
+        key = key or profile
+        entry = self._browsers.get(key)
+        if entry is None:
+            driver = launch_driver(self.hermetic, self.locators, self.credentials, self.headless, profile)
+            entry = self._browsers[key] = {"driver": driver, "tests": 0}
+        entry["tests"] += 1
+        return entry["driver"]
+
+    def release(self, driver, key: str = "full", reset: bool = False):
+        """
+        Sample the browser after a test and keep, reset or recycle it.
+        reset=True always opens a new chat, for tests that read the latest message.
+        """
+        entry = self._browsers.get(key)
+        if entry is None or entry["driver"] is not driver:
+            return
+        try:
+            sample = self.watchdog.sample(driver)
+            action, reason = self.watchdog.decide(sample, entry["tests"])
+        except Exception as e:
+            # A browser we cannot even query is not worth keeping
+            action, reason = RECYCLE, f"metrics unavailable ({e.__class__.__name__})"
+
+        if action == NEW_CHAT:
+            self.watchdog.stats.new_chats += 1
+            print(f"[Memory Watchdog] {self.worker}: new chat ({reason})")
+            driver.get(self.hermetic.base_url)
+        elif action == KEEP and reset:
+            driver.get(self.hermetic.base_url)
+        elif action == RECYCLE:
+            self.watchdog.stats.recycles += 1
+            print(f"[Memory Watchdog] {self.worker}: recycling browser ({reason})")
+            self._quit(key)
+
+    def invalidate(self, key: str = "full"):
+        """Drop a browser whose state a test could not clean up (e.g. after a failure)."""
+        self._quit(key)
+
+    def _quit(self, key: str):
+        entry = self._browsers.pop(key, None)
+        if entry is None:
+            return
+        self.hermetic.capture(entry["driver"])
+        try:
+            entry["driver"].quit()
+        except Exception:
+            pass
+
+    def close(self):
+        for key in list(self._browsers):
+            self._quit(key)
+        self.report()
+
+    def report(self) -> dict:
+        stats = self.watchdog.stats
+        peak = stats.peak
+        summary = {
+            "worker": self.worker,
+            "samples": stats.samples,
+            "new_chats": stats.new_chats,
+            "recycles": stats.recycles,
+            "peak_js_heap_mb": round(peak["js_heap_mb"], 1),
+            "peak_dom_nodes": peak["dom_nodes"],
+            "peak_rss_mb": round(peak["rss_mb"], 1),
+        }
+        print(
+            f"[Memory Watchdog] {self.worker}: peak heap {summary['peak_js_heap_mb']}MB, "
+            f"peak DOM nodes {summary['peak_dom_nodes']}, peak RSS {summary['peak_rss_mb']}MB, "
+            f"{stats.new_chats} new chats, {stats.recycles} recycles over {stats.samples} samples"
+        )
+        os.makedirs(self.report_dir, exist_ok=True)
+        with open(os.path.join(self.report_dir, f"memory_{self.worker}.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
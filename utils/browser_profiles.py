@@ -0,0 +1,80 @@
+"""
+Named Chrome performance profiles.
+
+"full" keeps the browser as a user would see it and is used for anything
+visual. "lean" blocks fonts, media and third-party analytics by URL pattern,
+turns off background features and caps the renderer heap at 1 GB, for checks
+that only look at DOM attributes or text. Images stay enabled: the profile menu that
+switch_language() clicks is an <img>, and a blocked image can render at
+zero size and never become clickable.
+
+Tests opt in with @pytest.mark.browser_profile("lean"); the default comes
+from --browser-profile.
+"""
+
+BROWSER_PROFILES = {
+    "full": {
+        "arguments": [],
+        "prefs": {},
+        "blocked_urls": [],
+    },
+    "lean": {
+        "arguments": [
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--disable-sync",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-domain-reliability",
+            "--disable-client-side-phishing-detection",
+            "--disable-features=Translate,OptimizationHints,MediaRouter,InterestFeedContentSuggestions",
+            "--no-first-run",
+            "--mute-audio",
+            # Hard per-renderer cap, well below V8's own default of several GB.
+            # The watchdog (--max-js-heap-mb, 512 by default) recycles a reused
+            # browser between tests once it passes its limit; this cap stops a
+            # single runaway test, which then fails with a renderer crash. A
+            # --max-js-heap-mb at or above this value never triggers.
+            "--js-flags=--max-old-space-size=1024",
+        ],
+        # 2 = block
+        "prefs": {
+            "profile.default_content_setting_values.notifications": 2,
+        },
+        # CDP Network.setBlockedURLs patterns (wildcards allowed). Blocking is by
+        # URL only: type-based blocking needs Fetch.requestPaused handlers,
+        # which execute_cdp_cmd cannot register.
+        "blocked_urls": [
+            "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+            "*.mp4", "*.webm", "*.mp3", "*.wav",
+            "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+            "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+            "*hotjar.com*", "*clarity.ms*", "*facebook.net*", "*connect.facebook.com*",
+        ],
+    },
+}
+
+
+def get_browser_profile(name: str) -> dict:
+    if name not in BROWSER_PROFILES:
+        raise ValueError(f"Unsupported browser profile: {name} (available: {', '.join(BROWSER_PROFILES)})")
+    return BROWSER_PROFILES[name]
+
+
+def apply_profile_options(options, name: str):
+    """Add a profile's command-line switches and prefs to ChromeOptions before launch."""
+    profile = get_browser_profile(name)
+    for argument in profile["arguments"]:
+        options.add_argument(argument)
+    if profile["prefs"]:
+        options.add_experimental_option("prefs", profile["prefs"])
+    return options
+
+
+def apply_profile_cdp(driver, name: str):
+    """Install a profile's URL blocking through CDP; call before the first navigation."""
+    profile = get_browser_profile(name)
+    if profile["blocked_urls"]:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+    return driver
@@ -17,6 +17,12 @@ from selenium.common.exceptions import TimeoutException
 from selenium import webdriver
 from webdriver_manager.chrome import ChromeDriverManager
 
+from utils.text_normalization import normalize_text, tokenize, find_normalized_matches
+from utils.response_index import ResponseIndex, DEFAULT_INDEX_PATH
+from utils.browser_profiles import apply_profile_options, apply_profile_cdp
+from utils.live_events import publish
+from utils.network_profiles import apply_network_profile, reset_network, measure_query, record_network_result, current_run_id
+
 
 # -------------------------
 # Data loading utilities
@@ -41,6 +47,7 @@ def save_screenshot(driver, test_name):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     screenshot_path = os.path.join(folder, f"{test_name}_{timestamp}.png")
     driver.save_screenshot(screenshot_path)
+    publish("screenshot", test_name=test_name, path=screenshot_path)
 
 LOG_FILE = "logs/logs.log"  # single consistent log file
 
@@ -56,6 +63,7 @@ def log_ui_result(test_name: str, passed: bool, details: str = "", language: str
         + "\n"
     )
     print(line.strip())
+    publish("result", test_name=test_name, status=status, language=language, details=details[:500])
     # Open in append mode to keep existing logs
     with open(LOG_FILE, "a", encoding="utf-8") as f:
         f.write(line)
@@ -74,18 +82,121 @@ def assert_with_logging(condition: bool, driver, test_name: str, success_details
     log_and_screenshot(driver, test_name, False, failure_details or "Assertion failed", language)
     assert condition, failure_details or f"Assertion failed in {test_name}"
 
+# -------------------------
+# Login helpers
+# -------------------------
+
+def login_to_dashboard(driver, locators, credentials, timeout=10):
+    """Log in with email/password on the already opened login page and wait for the dashboard."""
+    wait = WebDriverWait(driver, timeout)
+
+    # Click "Login with Credentials"
+    login_btn = wait.until(
+        EC.element_to_be_clickable((By.XPATH, locators["login_page"]["login_credentials_button"]))
+    )
+    login_btn.click()
+
+    # Enter Email
+    email_input = wait.until(
+        EC.presence_of_element_located((By.ID, locators["login_page"]["email_input"]))
+    )
+    email_input.send_keys(credentials["email"])
+
+    # Enter Password
+    password_input = driver.find_element(By.ID, locators["login_page"]["password_input"])
+    password_input.send_keys(credentials["password"])
+
+    # Click Sign In
+    driver.find_element(By.CSS_SELECTOR, locators["login_page"]["sign_in_button"]).click()
+
+    # Wait for Dashboard greeting
+    wait.until(
+        EC.presence_of_element_located((By.XPATH, locators["dashboard_page"]["welcome_message"]))
+    )
+
+def create_driver(hermetic, headless: bool = True, profile: str = "full"):
+    """Start Chrome with a browser profile for the hermetic session mode, without navigating."""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--window-size=1920,1080")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+    apply_profile_options(options, profile)
+
+    service = Service(ChromeDriverManager().install())
+    driver = hermetic.create_driver(service, options)
+    apply_profile_cdp(driver, profile)
+    return driver
+
+def launch_driver(hermetic, locators, credentials, headless: bool = True, profile: str = "full"):
+    """Launch Chrome WebDriver with a browser profile and log in to dashboard."""
+    driver = create_driver(hermetic, headless, profile)
+    driver.get(hermetic.base_url)
+
+    try:
+        login_to_dashboard(driver, locators, credentials)
+    except Exception:
+        hermetic.capture(driver)
+        driver.quit()
+        raise
+
+    return driver
+
 # -------------------------
 # Viewport helpers
 # -------------------------
 
+def get_device(name: str) -> dict:
+    """Look up a device profile from ui_tests.devices in test data."""
+    for device in load_test_data()["ui_tests"]["devices"]:
+        if device["name"] == name:
+            return device
+    raise ValueError(f"Unsupported mode: {name}")
+
+# Real user agent per browser session, captured before the first override
+_original_user_agents: dict[str, str] = {}
+
+def emulate_device(driver, device: dict, reload: bool = False):
+    """
+    Apply viewport, DPR, touch and user agent through CDP emulation in the current tab.
+    Layout updates immediately; pass reload=True so the page also sees the new user agent.
+    """
+    driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+        "width": device["width"],
+        "height": device["height"],
+        "deviceScaleFactor": device.get("device_scale_factor", 1),
+        "mobile": device.get("mobile", False),
+    })
+    touch = device.get("touch", False)
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {
+        "enabled": touch,
+        "maxTouchPoints": 5 if touch else 1,
+    })
+    if device.get("user_agent"):
+        if driver.session_id not in _original_user_agents:
+            _original_user_agents[driver.session_id] = driver.execute_script("return navigator.userAgent")
+        driver.execute_cdp_cmd("Emulation.setUserAgentOverride", {"userAgent": device["user_agent"]})
+    if reload:
+        driver.refresh()
+
+def clear_device_emulation(driver, reload: bool = False):
+    """
+    Drop viewport and touch overrides and restore the real user agent.
+    Pass reload=True so the page also sees the restored user agent.
+    """
+    driver.execute_cdp_cmd("Emulation.clearDeviceMetricsOverride", {})
+    driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {"enabled": False})
+    user_agent = _original_user_agents.pop(driver.session_id, None)
+    if user_agent:
+        driver.execute_cdp_cmd("Emulation.setUserAgentOverride", {"userAgent": user_agent})
+    if reload:
+        driver.refresh()
+
 def switch_view(driver, mode="desktop"):
-    """Set browser window size for desktop or mobile view."""
-    if mode == "desktop":
-        driver.set_window_size(1920, 1080)
-    elif mode == "mobile":
-        driver.set_window_size(390, 844)
-    else:
-        raise ValueError(f"Unsupported mode: {mode}")
+    """Emulate a named device from test data ("desktop", "mobile", ...) without resizing the window."""
+    emulate_device(driver, get_device(mode))
 
 def get_chat_widget(driver, locators, timeout=10):
     """Wait for chat widget to load and return it."""
@@ -159,7 +270,8 @@ def validate_language_based_responses(
     test_data,
     lang="en",
     num_queries: int | None = 3,
-    threshold: float = 0.8
+    threshold: float = 0.8,
+    response_index: ResponseIndex | None = None
 ):
     """
     Validate AI responses in a single browser session for a language.
@@ -170,6 +282,7 @@ def validate_language_based_responses(
     :param lang: Language code ("en" or "ar")
     :param num_queries: Number of queries to validate (default 3, max = total queries)
     :param threshold: Minimum similarity threshold (0.0-1.0)
+    :param response_index: Optional ResponseIndex to record responses for drift detection
     """
 
     total_queries = len(test_data)
@@ -196,12 +309,14 @@ def validate_language_based_responses(
         # Step 3: Get AI response
         ai_element = get_ai_response(driver, locators, timeout=20)
         actual_response = ai_element.text
+        record_response(response_index, message, lang, actual_response, source="response_validation")
 
         # Step 4: Get the corresponding expected response for this query
         expected_response = query_item["expected_response"][lang][0]  # always pick the first string in the list
 
         # Step 5: Check accuracy
         passed, matched_percentage = response_accuracy_checker(actual_response, expected_response, threshold)
+        publish("metric", name="response_match_percent", value=matched_percentage, language=lang, test_name=test_name)
 
         # Step 6: Build success/failure details
         success_details = (
@@ -230,30 +345,49 @@ def validate_language_based_responses(
         )
 
 
-def response_accuracy_checker(actual_response: str, expected_response: str, threshold: float = 0.8):
+def local_similarity(text_1: str, text_2: str) -> float:
+    """Offline similarity (0.0-1.0) of two normalized texts, by token sequence alignment."""
+    return SequenceMatcher(None, tokenize(text_1), tokenize(text_2), autojunk=False).ratio()
+
+
+def response_accuracy_checker(actual_response: str, expected_response: str, threshold: float = 0.8, scorer=None):
     """
     Compare actual response with expected content using API Ninjas Text Similarity API.
+    Both texts are normalized first; identical normalized texts skip the API call.
+    Pass scorer(text_1, text_2) -> float (e.g. local_similarity) to score without the API.
     Returns: (passed: bool, matched_percentage: float)
     """
     api_url = "https://api.api-ninjas.com/v1/textsimilarity"
     api_key = "4K/u77Y6FrpJfaxhfLpPpQ==3oaVNNWwd9YVBcaE"
 
+    normalized_expected = normalize_text(expected_response)
+    normalized_actual = normalize_text(actual_response)
+
     body = {
-        "text_1": expected_response,
-        "text_2": actual_response
+        "text_1": normalized_expected,
+        "text_2": normalized_actual
     }
 
     try:
-        response = requests.post(api_url, headers={"X-Api-Key": api_key}, json=body)
-        if response.status_code == requests.codes.ok:
-            result = response.json()
-            similarity = result.get("similarity", 0.0)  # value between 0.0 and 1.0
+        if normalized_expected and normalized_expected == normalized_actual:
+            # Identical after normalization, no need to pay for an API round trip
+            matched_percentage = 100.0
+            passed = True
+        elif scorer is not None:
+            similarity = scorer(normalized_expected, normalized_actual)
             matched_percentage = round(similarity * 100, 2)
             passed = similarity >= threshold
         else:
-            print(f"Error: {response.status_code}, {response.text}")
-            matched_percentage = 0.0
-            passed = False
+            response = requests.post(api_url, headers={"X-Api-Key": api_key}, json=body)
+            if response.status_code == requests.codes.ok:
+                result = response.json()
+                similarity = result.get("similarity", 0.0)  # value between 0.0 and 1.0
+                matched_percentage = round(similarity * 100, 2)
+                passed = similarity >= threshold
+            else:
+                print(f"Error: {response.status_code}, {response.text}")
+                matched_percentage = 0.0
+                passed = False
     except Exception as e:
         print(f"Exception while checking similarity: {e}")
         matched_percentage = 0.0
@@ -272,18 +406,35 @@ def response_accuracy_checker(actual_response: str, expected_response: str, thre
 def malicious_response_checker(actual_response: str, expected_phrases: list[str]) -> bool:
     """
     Check if the actual response contains at least one of the expected rejection phrases.
-    Case insensitive match. Simple pass/fail.
+    Matching uses normalize_text(), so case, curly quotes and Arabic letter variants are ignored.
     """
-    actual_response_lower = actual_response.lower()
-    for phrase in expected_phrases:
-        if phrase.lower() in actual_response_lower:
-            print(f"[Malicious Check] Matched expected phrase: '{phrase}'")
-            return True
+    matches = find_normalized_matches(actual_response, expected_phrases)
+    if matches:
+        print(f"[Malicious Check] Matched expected phrase: '{matches[0]}'")
+        return True
 
     print(f"[Malicious Check] No expected phrases matched. Response: {actual_response[:120]}...")
     return False
 
 
+def record_response(response_index: ResponseIndex | None, question: str, lang: str, response: str, source: str):
+    """Add a captured response to the history index and print drift / duplicate alerts."""
+    if response_index is None:
+        return None
+    result = response_index.add(question, lang, response, source)
+    if result.drifted:
+        print(
+            f"[Response Index] Drift for '{question}' ({lang}): "
+            f"{result.previous_similarity:.0%} similar to previous answer"
+        )
+    if result.duplicate_questions:
+        print(
+            f"[Response Index] Same answer as {len(result.duplicate_questions)} other question(s): "
+            + " | ".join(result.duplicate_questions[:5])
+        )
+    return result
+
+
 # -------------------------
 # Language helpers
 # -------------------------
@@ -293,6 +444,10 @@ def get_html_attributes(driver, locators):
     html_tag = driver.find_element(By.XPATH, locators["dashboard_page"]["html_tag"])
     return html_tag.get_attribute("lang"), html_tag.get_attribute("dir")
 
+# UI language per browser session, kept in sync by switch_language()
+_browser_languages: dict[str, str] = {}
+LANGUAGE_SWITCHES = {"performed": 0, "skipped": 0}
+
 def switch_language(driver, locators, to_lang="ar"):
     """
     Dynamically switch language (supports Arabic <-> English).
@@ -321,4 +476,30 @@ def switch_language(driver, locators, to_lang="ar"):
     switch_btn = wait.until(
         EC.element_to_be_clickable((By.XPATH, locators["dashboard_page"][locator_key]))
     )
-    switch_btn.click()
\ No newline at end of file
+    switch_btn.click()
+
+    # Step 4: Wait for the page to report the new language (best-effort)
+    try:
+        WebDriverWait(driver, 10).until(
+            lambda d: (get_html_attributes(d, locators)[0] or "").startswith(to_lang)
+        )
+    except TimeoutException:
+        pass
+    _browser_languages[driver.session_id] = to_lang
+    LANGUAGE_SWITCHES["performed"] += 1
+
+def ensure_language(driver, locators, lang):
+    """
+    Switch the UI to lang only if this browser is not already in it.
+    The current language is tracked per browser session; on first use it is read from <html lang>.
+    Returns True if a switch was made.
+    """
+    current = _browser_languages.get(driver.session_id)
+    if current is None:
+        current = (get_html_attributes(driver, locators)[0] or "en")[:2]
+        _browser_languages[driver.session_id] = current
+    if current == lang:
+        LANGUAGE_SWITCHES["skipped"] += 1
+        return False
+    switch_language(driver, locators, to_lang=lang)
+    return True
\ No newline at end of file
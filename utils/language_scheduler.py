@@ -0,0 +1,103 @@
+"""
+Collection-time language planning.
+
+Every item that needs a specific UI language (query_item_en / query_item_ar
+parametrization, a network_lang parameter, or an explicit
+@pytest.mark.language("ar")) is kept only if its language is listed in
+ui_tests.languages.
+
+Grouping only pays off when browsers are reused (--reuse-browser): the
+driver fixture then calls ensure_language() before each such item, which
+skips the switch when the browser is already in the right language. In that
+mode items are grouped by language in ui_tests.languages order, and under
+xdist each language is split into contiguous xdist_groups, about one per
+worker in proportion to the language's share of the items. --dist loadgroup
+keeps every group on one worker, so all workers stay busy and a browser
+switches at most once per group it takes. With a fresh browser per test
+nothing is reordered and no switch is made.
+"""
+import math
+
+# Fixture name -> language for the per-language query parametrization
+LANGUAGE_FIXTURES = {
+    "query_item_en": "en",
+    "query_item_ar": "ar",
+}
+# Fixtures whose parametrized value is the language itself
+LANGUAGE_PARAMS = ("network_lang",)
+
+
+def item_language(item) -> str | None:
+    """Target UI language of a collected item, or None if it doesn't depend on one."""
+    marker = item.get_closest_marker("language")
+    if marker is not None:
+        return marker.args[0]
+    params = getattr(getattr(item, "callspec", None), "params", {})
+    for fixture in LANGUAGE_PARAMS:
+        if fixture in params:
+            return params[fixture]
+    for fixture, lang in LANGUAGE_FIXTURES.items():
+        if fixture in getattr(item, "fixturenames", ()):
+            return lang
+    return None
+
+
+def xdist_group_name(lang: str, chunk: int = 0) -> str:
+    return f"language-{lang}-{chunk}"
+
+
+def xdist_groups(items: list, workers: int) -> list[tuple[object, str]]:
+    """
+    (item, xdist_group name) for every language-dependent item. Each language
+    is cut into round(workers * share) contiguous chunks (at least one, at most
+    one per item), so `items` should already be grouped by language.
+    """
+    by_language: dict[str, list] = {}
+    for item in items:
+        lang = item_language(item)
+        if lang is not None:
+            by_language.setdefault(lang, []).append(item)
+    total = sum(len(lang_items) for lang_items in by_language.values())
+    groups = []
+    for lang, lang_items in by_language.items():
+        chunks = max(1, min(len(lang_items), round(workers * len(lang_items) / total)))
+        size = math.ceil(len(lang_items) / chunks)
+        groups += [(item, xdist_group_name(lang, i // size)) for i, item in enumerate(lang_items)]
+    return groups
+
+
+def plan(items: list, languages: list[str], group: bool = True):
+    """
+    Return (ordered, deselected, stats). Items for languages not in `languages`
+    are deselected. With group=True the rest are grouped by language in
+    `languages` order after the language-independent items; otherwise the
+    collection order is kept.
+    """
+    rank = {lang: i for i, lang in enumerate(languages)}
+    independent, dependent, deselected, kept = [], [], [], []
+    per_language = {lang: 0 for lang in languages}
+    for index, item in enumerate(items):
+        lang = item_language(item)
+        if lang is not None and lang not in rank:
+            deselected.append(item)
+            continue
+        kept.append(item)
+        if lang is None:
+            independent.append(item)
+        else:
+            dependent.append((rank[lang], index, item))
+            per_language[lang] += 1
+
+    if group:
+        dependent.sort(key=lambda entry: (entry[0], entry[1]))
+        ordered = independent + [item for _, _, item in dependent]
+    else:
+        ordered = kept
+
+    stats = {
+        "language_items": len(dependent),
+        "deselected": len(deselected),
+        "per_language": per_language,
+        "grouped": group,
+    }
+    return ordered, deselected, stats
@@ -0,0 +1,331 @@
+"""
+Optional live event stream for in-progress runs.
+
+An EventServer (started by pytest --live-events, or standalone with
+`python -m utils.live_events`) accepts batched events over HTTP POST and
+fans them out to dashboards over Server-Sent Events. Test processes publish
+through a non-blocking EventPublisher: events go into a bounded queue that a
+background thread flushes, and are dropped when the queue is full, so a slow
+or absent dashboard never slows a test worker down; how many were dropped is
+sent as a "dropped" event with the next batch that gets through. Each
+subscriber has its own bounded buffer; events carrying a coalesce key replace
+their pending predecessor and the oldest events are dropped on overflow.
+
+Usage:
+    python -m utils.live_events [--port 8765]
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+ENV_URL = "GOVGPT_LIVE_EVENTS_URL"
+DEFAULT_PORT = 8765
+
+
+# -------------------------
+# Server side
+# -------------------------
+
+class _Subscriber:
+    """Bounded per-dashboard buffer with coalescing by key."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self.pending: OrderedDict = OrderedDict()
+        self.dropped = 0
+        self._seq = 0
+        self.cond = threading.Condition()
+
+    def push(self, event: dict):
+        with self.cond:
+            key = event.get("coalesce")
+            if key is not None and key in self.pending:
+                self.pending[key] = event  # newer state replaces the pending one in place
+            else:
+                if len(self.pending) >= self.maxlen:
+                    self.pending.popitem(last=False)
+                    self.dropped += 1
+                self._seq += 1
+                self.pending[key if key is not None else ("seq", self._seq)] = event
+            self.cond.notify()
+
+    def drain(self, timeout: float) -> list[dict]:
+        with self.cond:
+            if not self.pending:
+                self.cond.wait(timeout)
+            events = list(self.pending.values())
+            self.pending.clear()
+            return events
+
+
+class EventServer:
+    """SSE fan-out server with a small replay buffer for dashboards that join late."""
+
+    def __init__(self, host: str = "localhost", port: int = DEFAULT_PORT,
+                 history: int = 2000, subscriber_buffer: int = 500):
+        self.history = deque(maxlen=history)
+        self.subscriber_buffer = subscriber_buffer
+        self.subscribers: list[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{'localhost' if host in ('127.0.0.1', '::1') else host}:{port}"
+
+    def start(self) -> "EventServer":
+        threading.Thread(target=self._httpd.serve_forever, name="live-events", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def broadcast(self, events: list[dict]):
+        with self._lock:
+            self.history.extend(events)
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            for event in events:
+                subscriber.push(event)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if self.path != "/publish":
+                    self.send_error(404)
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                try:
+                    events = json.loads(body)
+                except ValueError:
+                    self.send_error(400)
+                    return
+                server.broadcast(events if isinstance(events, list) else [events])
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path == "/events":
+                    self._stream()
+                elif self.path in ("/", "/index.html"):
+                    body = DASHBOARD_HTML.encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                subscriber = _Subscriber(server.subscriber_buffer)
+                with server._lock:
+                    backlog = list(server.history)
+                    server.subscribers.append(subscriber)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    self._write(backlog)
+                    while True:
+                        events = subscriber.drain(timeout=15)
+                        if subscriber.dropped:
+                            events.append({"type": "dropped", "count": subscriber.dropped})
+                            subscriber.dropped = 0
+                        if events:
+                            self._write(events)
+                        else:
+                            self.wfile.write(b": keepalive\n\n")
+                            self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError, OSError):
+                    pass
+                finally:
+                    with server._lock:
+                        server.subscribers.remove(subscriber)
+
+            def _write(self, events):
+                if not events:
+                    return
+                payload = "".join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events)
+                self.wfile.write(payload.encode("utf-8"))
+                self.wfile.flush()
+
+        return Handler
+
+
+# -------------------------
+# Publisher side
+# -------------------------
+
+class EventPublisher:
+    """Never blocks the caller: bounded queue, background batching, drop on overflow or error."""
+
+    def __init__(self, url: str, maxsize: int = 1000, batch_size: int = 50, flush_interval: float = 0.25):
+        self.url = url.rstrip("/") + "/publish"
+        self.worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._reported_drops = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="live-events-publisher", daemon=True)
+        self._thread.start()
+
+    def publish(self, event_type: str, coalesce: str | None = None, **data):
+        event = {"type": event_type, "worker": self.worker, "ts": time.time(), **data}
+        if coalesce is not None:
+            event["coalesce"] = coalesce
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            self._send(batch)
+        self._send([])  # drops since the last batch
+
+    def _send(self, batch: list[dict]):
+        # Sent outside the queue, which may be the thing that is full
+        unreported = self.dropped - self._reported_drops
+        if unreported:
+            batch = batch + [{"type": "dropped", "worker": self.worker, "ts": time.time(), "count": unreported}]
+        if not batch:
+            return
+        try:
+            self._session.post(self.url, json=batch, timeout=2)
+            self._reported_drops += unreported
+        except requests.RequestException:
+            self.dropped += len(batch) - bool(unreported)
+
+    def close(self, timeout: float = 3.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+_publisher: EventPublisher | None = None
+
+
+def configure(url: str | None):
+    """Enable publishing for this process (no-op when url is empty)."""
+    global _publisher
+    if url and _publisher is None:
+        _publisher = EventPublisher(url)
+
+
+def shutdown():
+    global _publisher
+    if _publisher is not None:
+        _publisher.close()
+        _publisher = None
+
+
+def publish(event_type: str, coalesce: str | None = None, **data):
+    """Publish an event if live events are enabled; otherwise do nothing."""
+    if _publisher is not None:
+        _publisher.publish(event_type, coalesce=coalesce, **data)
+
+
+# -------------------------
+# Dashboard
+# -------------------------
+
+DASHBOARD_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>GovGPT QA - live run</title>
+<style>
+body{font-family:system-ui,sans-serif;margin:24px;color:#222}
+.cards{display:flex;gap:16px;flex-wrap:wrap}
+.card{border:1px solid #ddd;border-radius:8px;padding:12px 16px;min-width:140px}
+.card b{display:block;font-size:24px}
+table{border-collapse:collapse;margin-top:16px;width:100%}
+td,th{border-bottom:1px solid #eee;padding:4px 8px;text-align:left;font-size:13px}
+.PASS,.passed{color:#1a7f37}.FAIL,.failed{color:#cf222e}
+</style></head><body>
+<h2>GovGPT QA &mdash; live run</h2>
+<div class="cards">
+ <div class="card">Tests done<b id="done">0</b></div>
+ <div class="card">Throughput<b id="tput">-</b>tests/min</div>
+ <div class="card">Pass rate<b id="rate">-</b></div>
+ <div class="card">Latency p50 / p90 / p99<b id="lat">-</b></div>
+ <div class="card">Dropped events<b id="dropped">0</b></div>
+</div>
+<h3>Workers</h3><table id="workers"><tr><th>Worker</th><th>Status</th><th>Current / last test</th><th>Done</th></tr></table>
+<h3>Recent results</h3><table id="results"><tr><th>Time</th><th>Worker</th><th>Status</th><th>Check</th><th>Details</th></tr></table>
+<script>
+const s={done:0,passed:0,durations:[],start:null,workers:{},dropped:0};
+const pct=(a,p)=>{if(!a.length)return"-";const b=[...a].sort((x,y)=>x-y);return b[Math.min(b.length-1,Math.floor(p*b.length))].toFixed(1)+"s"};
+function render(){
+ document.getElementById("done").textContent=s.done;
+ const mins=s.start?(Date.now()/1000-s.start)/60:0;
+ document.getElementById("tput").textContent=mins>0?(s.done/mins).toFixed(1):"-";
+ document.getElementById("rate").textContent=s.done?(100*s.passed/s.done).toFixed(1)+"%":"-";
+ document.getElementById("lat").textContent=[.5,.9,.99].map(p=>pct(s.durations,p)).join(" / ");
+ document.getElementById("dropped").textContent=s.dropped;
+ const t=document.getElementById("workers");t.querySelectorAll("tr.w").forEach(r=>r.remove());
+ Object.entries(s.workers).sort().forEach(([w,v])=>{const r=t.insertRow();r.className="w";
+  [w,v.status,v.test||"",v.done||0].forEach((c,i)=>{const d=r.insertCell();d.textContent=c;if(i==1)d.className=v.status})});
+}
+function addResult(e){
+ const t=document.getElementById("results");const r=t.insertRow(1);
+ [new Date(e.ts*1000).toLocaleTimeString(),e.worker,e.status,e.test_name,(e.details||"").slice(0,160)]
+  .forEach((c,i)=>{const d=r.insertCell();d.textContent=c;if(i==2)d.className=c});
+ while(t.rows.length>51)t.deleteRow(51);
+}
+const es=new EventSource("/events");let pending=false;
+es.onmessage=m=>{const e=JSON.parse(m.data);
+ // dropped counts come from the server (no worker) and from publishers
+ if(e.type==="dropped")s.dropped+=e.count;
+ else if(e.worker!==undefined){s.start=s.start||e.ts;
+  const w=s.workers[e.worker]=s.workers[e.worker]||{status:"idle"};
+  if(e.type==="worker"){w.status=e.status;w.test=e.test}
+  else if(e.type==="test"){s.done++;w.done=(w.done||0)+1;w.status=e.outcome;
+   if(e.outcome==="passed")s.passed++;s.durations.push(e.duration)}
+  else if(e.type==="result")addResult(e)}
+ if(!pending){pending=true;requestAnimationFrame(()=>{pending=false;render()})}};
+</script></body></html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    server = EventServer(args.host, args.port).start()
+    print(f"[Live Events] Dashboard at {server.url}/ (publish with pytest --live-events-url={server.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
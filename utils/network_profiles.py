@@ -0,0 +1,226 @@
+"""
+Network-condition profiles and latency-degradation measurements.
+
+Profiles live in test data under network_tests.profiles and are applied with
+CDP Network.emulateNetworkConditions. Each measured query is appended to
+logs/network_degradation.jsonl with the id of its test run; the report turns
+the rows of the latest run (or of a chosen run, or of all runs) into a
+per-language degradation curve.
+
+Usage:
+    python -m utils.network_profiles [--results logs/network_degradation.jsonl] [--run-id ID | --all-runs]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.live_events import publish
+
+
+RESULTS_FILE = "logs/network_degradation.jsonl"
+# Shared by the xdist controller and its workers, which inherit its environment
+ENV_RUN_ID = "GOVGPT_NETWORK_RUN_ID"
+LATEST_RUN = "latest"
+
+_UNTHROTTLED = {"offline": False, "latency": 0, "downloadThroughput": -1, "uploadThroughput": -1}
+
+
+# -------------------------
+# Applying profiles
+# -------------------------
+
+def apply_network_profile(driver, profile: dict):
+    """Throttle the current tab; throughputs are in kbit/s in test data, bytes/s for CDP."""
+    conditions = {
+        "offline": profile.get("offline", False),
+        "latency": profile.get("latency_ms", 0),
+        "downloadThroughput": profile["download_kbps"] * 1000 / 8 if "download_kbps" in profile else -1,
+        "uploadThroughput": profile["upload_kbps"] * 1000 / 8 if "upload_kbps" in profile else -1,
+    }
+    if profile.get("packet_loss_percent"):
+        conditions["packetLoss"] = profile["packet_loss_percent"]
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.emulateNetworkConditions", conditions)
+
+
+def reset_network(driver):
+    driver.execute_cdp_cmd("Network.emulateNetworkConditions", _UNTHROTTLED)
+
+
+# -------------------------
+# Measuring
+# -------------------------
+
+def measure_query(driver, locators, message: str, timeout: float) -> dict:
+    """
+    Send message and time the UI: first visible assistant text (TTFT), the
+    response-complete indicator, and the fallback UI (error message or retry
+    control) for failed requests. Values are None when not reached in time.
+    """
+    chat = locators["chat_widget"]
+    shimmer_css = f".{chat['loading_shimmer']}"
+    assistant_xpath = chat["ai_message"]
+    complete_css = chat["response_complete_indicator"]
+    fallback_xpath = chat["fallback_indicator"]
+
+    def shimmer_visible(d):
+        return any(e.is_displayed() for e in d.find_elements(By.CSS_SELECTOR, shimmer_css))
+
+    def fallback_visible(d):
+        return any(e.is_displayed() for e in d.find_elements(By.XPATH, fallback_xpath))
+
+    def assistant_text(d):
+        elements = d.find_elements(By.XPATH, assistant_xpath)
+        return elements[0].text.strip() if elements else ""
+
+    input_box = driver.find_element(By.ID, chat["widget_container"])
+    start = time.perf_counter()
+    input_box.send_keys(message + Keys.ENTER)
+
+    result = {"ttft_s": None, "completion_s": None, "fallback_s": None, "shimmer_seen": False, "shimmer_stuck": False}
+    deadline = start + timeout
+    wait = WebDriverWait(driver, timeout, poll_frequency=0.05)
+
+    try:
+        wait.until(lambda d: shimmer_visible(d) or assistant_text(d) or fallback_visible(d))
+        result["shimmer_seen"] = shimmer_visible(driver)
+        wait.until(lambda d: assistant_text(d) or fallback_visible(d) or time.perf_counter() > deadline)
+        if assistant_text(driver):
+            result["ttft_s"] = round(time.perf_counter() - start, 3)
+        WebDriverWait(driver, max(0.0, deadline - time.perf_counter()), poll_frequency=0.1).until(
+            lambda d: d.find_elements(By.CSS_SELECTOR, complete_css) or fallback_visible(d)
+        )
+        if driver.find_elements(By.CSS_SELECTOR, complete_css):
+            result["completion_s"] = round(time.perf_counter() - start, 3)
+    except TimeoutException:
+        pass
+
+    if result["completion_s"] is None and fallback_visible(driver):
+        result["fallback_s"] = round(time.perf_counter() - start, 3)
+    result["shimmer_stuck"] = result["completion_s"] is None and shimmer_visible(driver)
+    return result
+
+
+def current_run_id() -> str:
+    """Id of this test run; set once by the first process that asks (the controller under xdist)."""
+    return os.environ.setdefault(ENV_RUN_ID, datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+
+def record_network_result(profile_name: str, lang: str, result: dict, passed: bool, path: str = RESULTS_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    row = {
+        "run_id": current_run_id(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "worker": os.environ.get("PYTEST_XDIST_WORKER", "main"),
+        "profile": profile_name,
+        "lang": lang,
+        "passed": passed,
+        **result,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(row) + "\n")
+    publish("metric", name="network_profile", **{k: v for k, v in row.items() if k != "worker"})
+
+
+# -------------------------
+# Degradation curve
+# -------------------------
+
+def _load_rows(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def latest_run_id(path: str = RESULTS_FILE) -> str | None:
+    """Run id of the last recorded row (None for files written before rows had one)."""
+    rows = _load_rows(path)
+    return rows[-1].get("run_id") if rows else None
+
+
+def degradation_curve(path: str = RESULTS_FILE, profiles: list[dict] | None = None,
+                      run_id: str | None = LATEST_RUN) -> dict[str, list[dict]]:
+    """
+    Per language, median TTFT/completion per profile in test-data order,
+    with the slowdown relative to the unthrottled profile. Only rows of
+    run_id are used: the latest run by default, every run with None.
+    """
+    if profiles is None:
+        from utils.helpers import load_test_data
+        profiles = load_test_data()["network_tests"]["profiles"]
+    order = [p["name"] for p in profiles]
+
+    rows = _load_rows(path)
+    if run_id == LATEST_RUN:
+        # None for files from before rows had a run id: those rows are all reported
+        run_id = rows[-1].get("run_id") if rows else None
+    if run_id is not None:
+        rows = [row for row in rows if row.get("run_id") == run_id]
+
+    grouped: dict[tuple[str, str], list[dict]] = {}
+    for row in rows:
+        grouped.setdefault((row["lang"], row["profile"]), []).append(row)
+
+    def median(rows, key):
+        values = [r[key] for r in rows if r[key] is not None]
+        return round(statistics.median(values), 3) if values else None
+
+    curves: dict[str, list[dict]] = {}
+    for lang in sorted({lang for lang, _ in grouped}):
+        points = []
+        for name in order:
+            rows = grouped.get((lang, name))
+            if not rows:
+                continue
+            points.append({
+                "profile": name,
+                "runs": len(rows),
+                "ttft_s": median(rows, "ttft_s"),
+                "completion_s": median(rows, "completion_s"),
+                "completed_rate": sum(r["completion_s"] is not None for r in rows) / len(rows),
+                "fallback_rate": sum(r.get("fallback_s") is not None for r in rows) / len(rows),
+                "shimmer_stuck_rate": sum(r["shimmer_stuck"] for r in rows) / len(rows),
+            })
+        baseline = next((p for p in points if p["profile"] == order[0]), None)
+        for point in points:
+            base = baseline and baseline["completion_s"]
+            point["slowdown"] = round(point["completion_s"] / base, 2) if base and point["completion_s"] else None
+        curves[lang] = points
+    return curves
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", default=RESULTS_FILE, help=f"Measurements file (default={RESULTS_FILE})")
+    runs = parser.add_mutually_exclusive_group()
+    runs.add_argument("--run-id", default=LATEST_RUN, help="Test run to report (default=the latest)")
+    runs.add_argument("--all-runs", action="store_true", help="Report every run in the file together")
+    args = parser.parse_args()
+    run_id = None if args.all_runs else args.run_id
+
+    def fmt(value, suffix="s"):
+        return f"{value}{suffix}" if value is not None else "-"
+
+    if run_id is None:
+        print("All runs")
+    else:
+        print(f"Run {latest_run_id(args.results) if run_id == LATEST_RUN else run_id}")
+    for lang, points in degradation_curve(args.results, run_id=run_id).items():
+        print(f"\n[{lang}]")
+        print(
+            f"{'profile':<14}{'runs':>5}{'TTFT':>10}{'complete':>10}{'slowdown':>10}"
+            f"{'done':>7}{'fallback':>10}{'stuck':>7}"
+        )
+        for p in points:
+            print(
+                f"{p['profile']:<14}{p['runs']:>5}{fmt(p['ttft_s']):>10}{fmt(p['completion_s']):>10}"
+                f"{fmt(p['slowdown'], 'x'):>10}{p['completed_rate']:>7.0%}{p['fallback_rate']:>10.0%}"
+                f"{p['shimmer_stuck_rate']:>7.0%}"
+            )
@@ -0,0 +1,454 @@
+"""
+Record/replay support for hermetic runs without the live GovGPT sandbox.
+
+Record mode drives Chrome through selenium-wire and stores every HTTP
+exchange (login, page assets, chat stream responses) in a gzip JSON-lines
+archive. Replay mode serves that archive from a local HTTP server with
+optional latency/jitter, and the suite is pointed at it instead of the
+live site. Every recorded host (auth, API, CDN) is resolved to the local
+server through Chrome's --host-resolver-rules and any other host fails to
+resolve, so a replayed run never reaches the network.
+
+Requests are matched on method, host, path and query, plus a digest of the
+body for anything but GET/HEAD, so chat POSTs are answered by question
+rather than by the order they were recorded in. Run-specific ids and
+timestamps are masked before matching; only true repeats of the same
+request are served in recorded order.
+
+Under pytest-xdist each worker records to its own part file and the
+controller merges them, in request order, when the session finishes.
+
+Only plain HTTP(S) exchanges are replayed; WebSocket upgrades are answered
+with 404 so socket clients fall back to HTTP polling where they support it.
+"""
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_to_bytes, urlsplit
+
+
+# Headers that describe the original wire encoding or pin the original host
+_DROPPED_HEADERS = {
+    "content-encoding", "content-length", "transfer-encoding", "connection",
+    "strict-transport-security", "alt-svc", "content-security-policy",
+}
+# Client-generated ids (chat/message UUIDs, hex ids) differ between runs
+_ID_SEGMENT_RE = re.compile(r"/(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{24,})(?=/|$)")
+# The same ids anywhere in a query string or request body, plus ISO and epoch timestamps
+_RUN_ID_RE = re.compile(
+    rb"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    rb"|\b[0-9a-fA-F]{24,}\b"
+    rb"|\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+    rb"|\b1\d{9}(?:\d{3})?(?:\.\d+)?\b"
+)
+_BODYLESS_METHODS = ("GET", "HEAD")
+_TEXT_TYPES = ("text/", "application/javascript", "application/json", "application/x-javascript")
+
+
+# -------------------------
+# Archive
+# -------------------------
+
+def _mask_run_ids(data: bytes) -> bytes:
+    return _RUN_ID_RE.sub(b"*", data)
+
+
+def exchange_key(method: str, host: str, path: str, query: str, body: bytes = b"") -> tuple[str, str]:
+    """
+    Lookup key shared by recording and replay. Run-specific ids and timestamps
+    in the path, query and body are masked; the body only counts for methods
+    other than GET/HEAD, as a short digest.
+    """
+    method = method.upper()
+    query = _mask_run_ids(unquote_to_bytes(query)).decode("utf-8", "replace")
+    key = f"{host.lower()}{_ID_SEGMENT_RE.sub('/:id', path)}?{query}"
+    if body and method not in _BODYLESS_METHODS:
+        key += "#" + hashlib.blake2b(_mask_run_ids(body), digest_size=8).hexdigest()
+    return method, key
+
+
+@dataclass
+class Exchange:
+    method: str
+    url: str
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    streamed: bool = False
+    request_body: bytes = b""
+    started: float = 0.0  # epoch seconds the request was sent, orders merged recordings
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.url).hostname or ""
+
+    @property
+    def key(self) -> tuple[str, str]:
+        parts = urlsplit(self.url)
+        return exchange_key(self.method, parts.hostname or "", parts.path, parts.query, self.request_body)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "method": self.method,
+            "url": self.url,
+            "status": self.status,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode("ascii"),
+            "streamed": self.streamed,
+            "request_body": base64.b64encode(self.request_body).decode("ascii"),
+            "started": self.started,
+        })
+
+    @classmethod
+    def from_json(cls, line: str) -> "Exchange":
+        data = json.loads(line)
+        data["headers"] = [tuple(h) for h in data["headers"]]
+        data["body"] = base64.b64decode(data["body"])
+        data["request_body"] = base64.b64decode(data.get("request_body", ""))
+        return cls(**data)
+
+
+class ReplayArchive:
+    """Ordered exchanges per exchange_key(); identical GET repeats are stored once."""
+
+    def __init__(self):
+        self.exchanges: dict[tuple[str, str], list[Exchange]] = defaultdict(list)
+
+    def __len__(self):
+        return sum(len(items) for items in self.exchanges.values())
+
+    def __iter__(self):
+        """All exchanges in the order their requests were sent."""
+        return iter(sorted(
+            (exchange for items in self.exchanges.values() for exchange in items),
+            key=lambda exchange: exchange.started,
+        ))
+
+    @property
+    def hosts(self) -> set[str]:
+        return {items[0].host for items in self.exchanges.values() if items}
+
+    def add(self, exchange: Exchange):
+        recorded = self.exchanges[exchange.key]
+        if exchange.method.upper() == "GET" and any(e.body == exchange.body for e in recorded):
+            return
+        recorded.append(exchange)
+
+    def add_wire_requests(self, wire_requests):
+        """Convert selenium-wire captured requests into exchanges."""
+        from seleniumwire.utils import decode
+
+        for request in wire_requests:
+            response = request.response
+            if response is None or request.headers.get("Upgrade", "").lower() == "websocket":
+                continue
+            body = response.body
+            encoding = response.headers.get("Content-Encoding", "identity")
+            if body and encoding != "identity":
+                try:
+                    body = decode(body, encoding)
+                except ValueError:
+                    pass
+            content_type = response.headers.get("Content-Type", "")
+            self.add(Exchange(
+                method=request.method,
+                url=request.url,
+                status=response.status_code,
+                headers=[(k, v) for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS],
+                body=body or b"",
+                streamed="text/event-stream" in content_type or "ndjson" in content_type,
+                request_body=request.body or b"",
+                started=request.date.timestamp(),
+            ))
+
+    def save(self, path: str):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for exchange in self:
+                f.write(exchange.to_json() + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "ReplayArchive":
+        archive = cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    exchange = Exchange.from_json(line)
+                    archive.exchanges[exchange.key].append(exchange)
+        return archive
+
+
+def worker_archive_path(path: str, worker: str) -> str:
+    """Part file a single xdist worker records to."""
+    return f"{path}.{worker}.part"
+
+
+def merge_worker_archives(path: str) -> int:
+    """Merge and delete the per-worker part files of path; returns the number of parts merged."""
+    parts = sorted(glob.glob(worker_archive_path(glob.escape(path), "*")))
+    if not parts:
+        return 0
+    exchanges = [exchange for part in parts for exchange in ReplayArchive.load(part)]
+    archive = ReplayArchive()
+    for exchange in sorted(exchanges, key=lambda exchange: exchange.started):
+        archive.add(exchange)
+    archive.save(path)
+    for part in parts:
+        os.remove(part)
+    print(f"[Replay] Merged {len(parts)} worker recordings ({len(archive)} exchanges) into {path}")
+    return len(parts)
+
+
+# -------------------------
+# Replay server
+# -------------------------
+
+class ReplayServer:
+    """
+    Local HTTP server answering from a ReplayArchive.
+
+    Requests are looked up by their Host header: the recorded origin is
+    served as localhost, every other recorded host as http://<host>:<port>
+    (see host_resolver_rules) and matched with exchange_key(), request body
+    included. Repeats of the same request are served in recorded order and
+    the last recording is reused once they run out.
+    URLs of recorded hosts in text bodies and headers are rewritten to their
+    local form, and streamed bodies are sent in chunks so the UI still sees
+    incremental output.
+    """
+
+    def __init__(
+        self,
+        archive: ReplayArchive,
+        origin: str,
+        host: str = "localhost",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        chunk_size: int = 256,
+        chunk_delay_ms: float = 0.0,
+    ):
+        self.archive = archive
+        self.origin = origin.rstrip("/")
+        self.origin_host = (urlsplit(origin).hostname or "").lower()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_size = chunk_size
+        self.chunk_delay_ms = chunk_delay_ms
+        self.served = 0
+        self.missed = 0
+        self._cursors: dict[tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+        self.hosts = sorted(archive.hosts | {self.origin_host})
+        # scheme://host[:port] of any recorded host, also with JSON-escaped slashes
+        self._url_re = re.compile(
+            rb"https?:(?:\\?/){2}("
+            + b"|".join(re.escape(h.encode()) for h in sorted(self.hosts, key=len, reverse=True))
+            + rb")(?::\d+)?(?![\w.-])",
+            re.IGNORECASE,
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{'localhost' if host in ('127.0.0.1', '::1') else host}:{port}"
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def host_resolver_rules(self) -> str:
+        """Chrome --host-resolver-rules: recorded hosts go to this server, everything else fails."""
+        rules = [f"MAP {host} 127.0.0.1" for host in self.hosts if host != self.origin_host]
+        return ", ".join(rules + ["MAP * ~NOTFOUND", "EXCLUDE localhost"])
+
+    def local_url(self, host: str) -> str:
+        return self.url if host.lower() == self.origin_host else f"http://{host.lower()}:{self.port}"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _delay(self):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _lookup(self, method: str, host_header: str | None, path: str, body: bytes = b"") -> Exchange | None:
+        parts = urlsplit(path)
+        host = urlsplit(f"//{host_header or ''}").hostname or ""
+        if host in ("", "localhost", "127.0.0.1", "::1"):
+            host = self.origin_host
+        key = exchange_key(method, host, parts.path, parts.query, body)
+        recorded = self.archive.exchanges.get(key)
+        if not recorded:
+            return None
+        with self._lock:
+            index = min(self._cursors[key], len(recorded) - 1)
+            self._cursors[key] += 1
+        return recorded[index]
+
+    def _rewrite_urls(self, data: bytes) -> bytes:
+        return self._url_re.sub(lambda m: self.local_url(m.group(1).decode()).encode(), data)
+
+    def _rewrite(self, exchange: Exchange) -> bytes:
+        content_type = dict((k.lower(), v) for k, v in exchange.headers).get("content-type", "")
+        if not content_type.startswith(_TEXT_TYPES) and "event-stream" not in content_type:
+            return exchange.body
+        return self._rewrite_urls(exchange.body)
+
+    def _rewrite_header(self, name: str, value: str) -> str:
+        if name.lower() == "set-cookie":
+            # Host-only, non-Secure cookies so they stick to the plain-HTTP local hosts
+            value = ";".join(
+                p for p in value.split(";")
+                if p.strip().lower() not in ("secure", "samesite=none")
+                and not p.strip().lower().startswith("domain=")
+            )
+        return self._rewrite_urls(value.encode("latin-1")).decode("latin-1")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                exchange = server._lookup(self.command, self.headers.get("Host"), self.path, body)
+                server._delay()
+                if exchange is None:
+                    server.missed += 1
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                server.served += 1
+                body = server._rewrite(exchange)
+                self.send_response(exchange.status)
+                for name, value in exchange.headers:
+                    self.send_header(name, server._rewrite_header(name, value))
+
+                if not exchange.streamed:
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if self.command != "HEAD":
+                        self.wfile.write(body)
+                    return
+
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for start in range(0, len(body), server.chunk_size):
+                    chunk = body[start:start + server.chunk_size]
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+                    if server.chunk_delay_ms:
+                        time.sleep(server.chunk_delay_ms / 1000)
+                self.wfile.write(b"0\r\n\r\n")
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = do_HEAD = _serve
+
+            def do_OPTIONS(self):
+                self.send_response(204)
+                self.send_header("Access-Control-Allow-Origin", self.headers.get("Origin", "*"))
+                self.send_header("Access-Control-Allow-Credentials", "true")
+                self.send_header("Access-Control-Allow-Headers", "*")
+                self.send_header("Access-Control-Allow-Methods", "*")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        return Handler
+
+
+# -------------------------
+# Session wiring
+# -------------------------
+
+class HermeticSession:
+    """
+    Resolves live / record / replay mode for a test session.
+
+    live:   base_url is the real site, nothing is captured
+    record: drivers are created through selenium-wire and their traffic is
+            saved to archive_path when the session stops (to a per-worker
+            part file under xdist, see merge_worker_archives)
+    replay: archive_path is served locally, base_url points at it and
+            drivers resolve every recorded host to the local server
+    """
+
+    def __init__(self, base_url: str, record_path: str | None = None, replay_path: str | None = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, worker: str | None = None):
+        if record_path and replay_path:
+            raise ValueError("--record and --replay are mutually exclusive")
+        self.live_url = base_url
+        self.base_url = base_url
+        self.mode = "record" if record_path else "replay" if replay_path else "live"
+        self.archive_path = record_path or replay_path
+        self.worker = worker
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.archive: ReplayArchive | None = None
+        self.server: ReplayServer | None = None
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def start(self) -> "HermeticSession":
+        if self.mode == "record":
+            self.archive = ReplayArchive()
+        elif self.mode == "replay":
+            self.archive = ReplayArchive.load(self.archive_path)
+            self.server = ReplayServer(
+                self.archive, self.live_url, latency_ms=self.latency_ms, jitter_ms=self.jitter_ms
+            ).start()
+            self.base_url = self.server.url + "/"
+        return self
+
+    def create_driver(self, service, options):
+        """Chrome driver for the current mode (selenium-wire when recording)."""
+        if self.server is not None:
+            options.add_argument(f"--host-resolver-rules={self.server.host_resolver_rules}")
+        if self.recording:
+            from seleniumwire import webdriver as wire_webdriver
+            return wire_webdriver.Chrome(service=service, options=options)
+        from selenium import webdriver
+        return webdriver.Chrome(service=service, options=options)
+
+    def capture(self, driver):
+        """Store the traffic of a finished driver (record mode only)."""
+        if self.recording:
+            self.archive.add_wire_requests(driver.requests)
+
+    def stop(self):
+        if self.mode == "record":
+            path = worker_archive_path(self.archive_path, self.worker) if self.worker else self.archive_path
+            self.archive.save(path)
+            print(f"[Replay] Recorded {len(self.archive)} exchanges to {path}")
+        elif self.server is not None:
+            print(f"[Replay] Served {self.server.served} requests, {self.server.missed} not in archive")
+            self.server.stop()
@@ -0,0 +1,339 @@
+"""
+Persistent MinHash/LSH index over captured assistant responses.
+
+Each response is shingled into word n-grams, summarised as a MinHash
+signature and bucketed by LSH bands in a SQLite file. Every answer is kept in
+the responses table for drift history, but only the latest answer per
+(question, lang) stays in the LSH buckets, so candidate lookups for
+"same answer to different questions" grow with the number of questions,
+not with the number of runs.
+
+Usage:
+    python -m utils.response_index --report [--index logs/response_index.sqlite]
+"""
+import argparse
+import hashlib
+import random
+import sqlite3
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from utils.text_normalization import normalize_text, tokenize
+
+
+DEFAULT_INDEX_PATH = "logs/response_index.sqlite"
+SCHEMA_VERSION = 1  # stored in PRAGMA user_version
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SEED = 1729  # fixed so signatures stay comparable across runs and machines
+
+
+# -------------------------
+# MinHash primitives
+# -------------------------
+
+def shingle(text: str, size: int = 3) -> set[str]:
+    """Return the set of word n-grams of normalized text (whole text if shorter)."""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _stable_hash(value: str) -> int:
+    """32-bit hash that, unlike hash(), is identical across processes."""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+class MinHasher:
+    """Universal-hash MinHash with a fixed permutation family."""
+
+    def __init__(self, num_perm: int = 128):
+        rng = random.Random(_SEED)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: set[str]) -> tuple[int, ...]:
+        if not shingles:
+            return (_MAX_HASH,) * self.num_perm
+        hashes = [_stable_hash(s) for s in shingles]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._perms
+        )
+
+
+def estimate_similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+# -------------------------
+# Persistent index
+# -------------------------
+
+@dataclass
+class IndexedResponse:
+    """Outcome of adding a response to the index."""
+    record_id: int
+    previous_similarity: float | None = None   # vs. last answer to the same question
+    drifted: bool = False
+    duplicate_questions: list[str] = field(default_factory=list)
+
+
+class ResponseIndex:
+    """
+    SQLite-backed LSH index. Safe to share between pytest workers: every
+    write is a short transaction and SQLite serialises concurrent writers.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_INDEX_PATH,
+        num_perm: int = 128,
+        bands: int = 32,
+        drift_threshold: float = 0.5,
+        duplicate_threshold: float = 0.8,
+        run_id: str | None = None,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.path = path
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.drift_threshold = drift_threshold
+        self.duplicate_threshold = duplicate_threshold
+        self.run_id = run_id
+        self.hasher = MinHasher(num_perm)
+
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                question_key TEXT NOT NULL,
+                question TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                source TEXT NOT NULL,
+                run_id TEXT,
+                created_at TEXT NOT NULL,
+                response TEXT NOT NULL,
+                signature BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_question ON responses (question_key, lang, id);
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                bucket INTEGER NOT NULL,
+                response_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh_buckets (bucket);
+            CREATE INDEX IF NOT EXISTS idx_lsh_response ON lsh_buckets (response_id);
+            """
+        )
+        self._migrate()
+
+    def _migrate(self):
+        """Bring an index written by an older version up to SCHEMA_VERSION, once per file."""
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            # Re-read under the write lock: another worker may have just migrated
+            self.conn.execute("BEGIN IMMEDIATE")
+            (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+            if version < 1:
+                # Indexes written before buckets were limited to the latest answer
+                self.conn.execute(
+                    """
+                    DELETE FROM lsh_buckets WHERE response_id NOT IN
+                        (SELECT MAX(id) FROM responses GROUP BY question_key, lang)
+                    """
+                )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    # -- encoding helpers --
+
+    def _buckets(self, signature: tuple[int, ...]) -> list[int]:
+        """One signed 63-bit bucket key per band (band number is part of the key)."""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                f"{band}:{','.join(map(str, chunk))}".encode(), digest_size=8
+            ).digest()
+            keys.append(int.from_bytes(digest, "big") >> 1)
+        return keys
+
+    @staticmethod
+    def _pack(signature: tuple[int, ...]) -> bytes:
+        return array("I", signature).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> tuple[int, ...]:
+        values = array("I")
+        values.frombytes(blob)
+        return tuple(values)
+
+    # -- queries --
+
+    def signature_for(self, text: str) -> tuple[int, ...]:
+        return self.hasher.signature(shingle(text))
+
+    def candidates(self, signature: tuple[int, ...]) -> list[tuple[int, str, str, tuple[int, ...]]]:
+        """Latest answers sharing at least one LSH bucket: (id, question, lang, signature)."""
+        buckets = self._buckets(signature)
+        placeholders = ",".join("?" * len(buckets))
+        rows = self.conn.execute(
+            f"""
+            SELECT r.id, r.question, r.lang, r.signature FROM responses r
+            WHERE r.id IN (SELECT response_id FROM lsh_buckets WHERE bucket IN ({placeholders}))
+            """,
+            buckets,
+        ).fetchall()
+        return [(row[0], row[1], row[2], self._unpack(row[3])) for row in rows]
+
+    def similar(self, text: str, min_similarity: float | None = None) -> list[tuple[int, str, float]]:
+        """Indexed responses similar to text: [(id, question, similarity)], best first."""
+        min_similarity = self.duplicate_threshold if min_similarity is None else min_similarity
+        signature = self.signature_for(text)
+        matches = [
+            (row_id, question, estimate_similarity(signature, sig))
+            for row_id, question, _, sig in self.candidates(signature)
+        ]
+        return sorted((m for m in matches if m[2] >= min_similarity), key=lambda m: -m[2])
+
+    def previous_signature(self, question: str, lang: str) -> tuple[int, ...] | None:
+        row = self.conn.execute(
+            "SELECT signature FROM responses WHERE question_key = ? AND lang = ? ORDER BY id DESC LIMIT 1",
+            (normalize_text(question), lang),
+        ).fetchone()
+        return self._unpack(row[0]) if row else None
+
+    # -- writes --
+
+    def add(self, question: str, lang: str, response: str, source: str, run_id: str | None = None) -> IndexedResponse:
+        """Index a response and report drift / cross-question duplicates for it."""
+        question_key = normalize_text(question)
+        signature = self.signature_for(response)
+
+        previous = self.previous_signature(question, lang)
+        previous_similarity = estimate_similarity(signature, previous) if previous else None
+
+        duplicate_questions = sorted({
+            other_question
+            for _, other_question, other_lang, sig in self.candidates(signature)
+            if other_lang == lang
+            and normalize_text(other_question) != question_key
+            and estimate_similarity(signature, sig) >= self.duplicate_threshold
+        })
+
+        with self.conn:
+            cursor = self.conn.execute(
+                """
+                INSERT INTO responses (question_key, question, lang, source, run_id, created_at, response, signature)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (question_key, question, lang, source, run_id or self.run_id,
+                 datetime.now().isoformat(timespec="seconds"), response, self._pack(signature)),
+            )
+            record_id = cursor.lastrowid
+            # The new answer replaces older ones of this question in the buckets
+            self.conn.execute(
+                """
+                DELETE FROM lsh_buckets WHERE response_id IN
+                    (SELECT id FROM responses WHERE question_key = ? AND lang = ? AND id < ?)
+                """,
+                (question_key, lang, record_id),
+            )
+            self.conn.executemany(
+                "INSERT INTO lsh_buckets (bucket, response_id) VALUES (?, ?)",
+                [(bucket, record_id) for bucket in self._buckets(signature)],
+            )
+
+        return IndexedResponse(
+            record_id=record_id,
+            previous_similarity=previous_similarity,
+            drifted=previous_similarity is not None and previous_similarity < self.drift_threshold,
+            duplicate_questions=duplicate_questions,
+        )
+
+    # -- reports --
+
+    def duplicate_clusters(self, min_similarity: float | None = None) -> list[list[str]]:
+        """
+        Group the latest answer per (question, lang) into clusters of near-identical
+        answers and return the clusters that span more than one question.
+        """
+        min_similarity = self.duplicate_threshold if min_similarity is None else min_similarity
+        latest = self.conn.execute(
+            """
+            SELECT r.id, r.question_key, r.question, r.lang, r.signature FROM responses r
+            JOIN (SELECT MAX(id) AS id FROM responses GROUP BY question_key, lang) l ON r.id = l.id
+            """
+        ).fetchall()
+        latest_ids = {row[0] for row in latest}
+        parent = {row[0]: row[0] for row in latest}
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for row_id, _, _, lang, blob in latest:
+            signature = self._unpack(blob)
+            for other_id, _, other_lang, other_sig in self.candidates(signature):
+                if other_id in latest_ids and other_lang == lang and other_id != row_id \
+                        and estimate_similarity(signature, other_sig) >= min_similarity:
+                    parent[find(other_id)] = find(row_id)
+
+        groups: dict[int, set[str]] = {}
+        for row_id, question_key, question, _, _ in latest:
+            groups.setdefault(find(row_id), set()).add(question)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+    def drift_report(self) -> list[tuple[str, str, float]]:
+        """(question, lang, similarity) for questions whose last two answers drifted apart."""
+        rows = self.conn.execute(
+            """
+            SELECT question, lang, signature, previous FROM (
+                SELECT question, lang, signature,
+                       LAG(signature) OVER (PARTITION BY question_key, lang ORDER BY id) AS previous,
+                       ROW_NUMBER() OVER (PARTITION BY question_key, lang ORDER BY id DESC) AS recency
+                FROM responses
+            )
+            WHERE recency = 1 AND previous IS NOT NULL
+            ORDER BY question, lang
+            """
+        ).fetchall()
+        report = []
+        for question, lang, blob, previous_blob in rows:
+            similarity = estimate_similarity(self._unpack(blob), self._unpack(previous_blob))
+            if similarity < self.drift_threshold:
+                report.append((question, lang, similarity))
+        return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"Index file (default={DEFAULT_INDEX_PATH})")
+    parser.add_argument("--report", action="store_true", help="Print drift alerts and duplicate-answer clusters")
+    args = parser.parse_args()
+
+    index = ResponseIndex(args.index)
+    if args.report:
+        print("Drifted answers:")
+        for question, lang, similarity in index.drift_report():
+            print(f"  [{lang}] {similarity:.0%} similar to previous | {question}")
+        print("Same answer to different questions:")
+        for cluster in index.duplicate_clusters():
+            print(f"  {len(cluster)} questions: " + " | ".join(cluster))
+    index.close()
@@ -0,0 +1,144 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+
+# -------------------------
+# Precompiled tables and patterns
+# -------------------------
+# Everything here is built once at import time so the per-response cost is a
+# single regex substitution over the characters that need mapping plus a
+# split/join for whitespace; pure-ASCII text skips both NFKC and the mapping.
+
+# Arabic harakat, tanween, shadda, sukun, superscript alef and Quranic marks
+_ARABIC_DIACRITICS = (
+    [chr(c) for c in range(0x0610, 0x061B)]
+    + [chr(c) for c in range(0x064B, 0x0660)]
+    + ["\u0670"]
+    + [chr(c) for c in range(0x06D6, 0x06DD)]
+    + [chr(c) for c in range(0x06DF, 0x06E9)]
+    + [chr(c) for c in range(0x06EA, 0x06EE)]
+)
+
+_TATWEEL = "\u0640"
+
+# Zero-width and bidi control characters that leak in from rendered RTL text
+_INVISIBLE_CHARS = ["\u200b", "\u200c", "\u200d", "\u200e", "\u200f", "\u202a",
+                    "\u202b", "\u202c", "\u202d", "\u202e", "\u2066", "\u2067",
+                    "\u2068", "\u2069", "\ufeff", "\u00ad"]
+
+_CHAR_MAP = {
+    # Alef variants -> bare alef
+    "\u0622": "\u0627",  # آ
+    "\u0623": "\u0627",  # أ
+    "\u0625": "\u0627",  # إ
+    "\u0671": "\u0627",  # ٱ
+    # Alef maqsura / Farsi yeh -> yaa
+    "\u0649": "\u064a",  # ى
+    "\u06cc": "\u064a",  # ی
+    # Taa marbuta -> haa
+    "\u0629": "\u0647",  # ة
+    # Hamza carriers -> bare letters
+    "\u0624": "\u0648",  # ؤ
+    "\u0626": "\u064a",  # ئ
+    # Farsi kaf -> Arabic kaf
+    "\u06a9": "\u0643",  # ک
+    # Arabic punctuation -> Latin equivalents
+    "\u060c": ",",       # ،
+    "\u061b": ";",       # ؛
+    "\u061f": "?",       # ؟
+    "\u066a": "%",       # ٪
+    "\u066b": ".",       # ٫ decimal separator
+    "\u066c": ",",       # ٬ thousands separator
+    # Typographic quotes, apostrophes and dashes -> ASCII
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201a": "'",
+    "\u201b": "'",
+    "\u2032": "'",
+    "\u00b4": "'",
+    "`": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u201e": '"',
+    "\u00ab": '"',
+    "\u00bb": '"',
+    "\u2010": "-",
+    "\u2011": "-",
+    "\u2012": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u2212": "-",
+    "\u00a0": " ",
+}
+
+# Arabic-Indic and Extended Arabic-Indic digits -> ASCII digits
+for _offset in range(10):
+    _CHAR_MAP[chr(0x0660 + _offset)] = str(_offset)
+    _CHAR_MAP[chr(0x06F0 + _offset)] = str(_offset)
+
+for _char in _ARABIC_DIACRITICS + _INVISIBLE_CHARS + [_TATWEEL]:
+    _CHAR_MAP[_char] = None
+
+TRANSLATION_TABLE = str.maketrans(_CHAR_MAP)
+
+# re.sub over only the mapped characters is several times faster than
+# str.translate() with a dict table, which pays a lookup for every character
+_REPLACEMENTS = {char: value or "" for char, value in _CHAR_MAP.items()}
+_CHAR_RE = re.compile("[" + "".join(re.escape(char) for char in _CHAR_MAP) + "]")
+# Word tokens: runs of Unicode letters/digits, keeping inner apostrophes ("i'm")
+# and decimal/thousands separators inside numbers ("1,120", "5.5").
+_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)*|[^\W\d_]+(?:'[^\W\d_]+)*", re.UNICODE)
+
+
+# -------------------------
+# Public API
+# -------------------------
+
+def normalize_text(text: str | None) -> str:
+    """
+    Return a canonical form of English/Arabic text for comparison.
+    Applies NFKC, case folding, Arabic letter/digit unification, strips
+    diacritics, tatweel and invisible characters, and collapses whitespace.
+    Punctuation and markup are preserved so HTML checks still work.
+    """
+    if not text:
+        return ""
+    if text.isascii():
+        # NFKC is a no-op and backtick is the only mapped ASCII character
+        text = text.replace("`", "'").lower()
+    else:
+        text = unicodedata.normalize("NFKC", text)
+        text = _CHAR_RE.sub(lambda match: _REPLACEMENTS[match.group()], text).casefold()
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=4096)
+def _normalize_needle(needle: str | None) -> str:
+    """normalize_text() for phrase lists, which are fixed test data and repeat on every call."""
+    return normalize_text(needle)
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Normalize text and split it into word/number tokens."""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def contains_normalized(haystack: str | None, needle: str | None) -> bool:
+    """Case/diacritic/punctuation-variant insensitive substring test."""
+    normalized_needle = _normalize_needle(needle)
+    return bool(normalized_needle) and normalized_needle in normalize_text(haystack)
+
+
+def find_normalized_matches(haystack: str | None, needles: list[str]) -> list[str]:
+    """
+    Return the needles found in haystack after normalization.
+    The haystack is normalized once per call and each needle once per process.
+    """
+    normalized_haystack = normalize_text(haystack)
+    matches = []
+    for needle in needles:
+        normalized_needle = _normalize_needle(needle)
+        if normalized_needle and normalized_needle in normalized_haystack:
+            matches.append(needle)
+    return matches